@@ -2,198 +2,2482 @@
 
 import random
 import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import tkinter as tk
-from collections import deque
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from array import array
+from bisect import bisect_left
+from heapq import heappush, heappop
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+import argparse
+import csv
+import gc
+import gzip
+import json
+import math
+import mmap
+import os
+import queue
+import struct
+import statistics
 import time
+import tracemalloc
 import sys
+import threading
 
-class NetworkTopology:
+try:
+    import numpy as np  # Only needed by the vectorized all-pairs engine
+except ImportError:
+    np = None
+
+# Tk and matplotlib are bound by load_gui_toolkit() when the GUI starts, so the headless commands and the routing code
+# run without them (and without NumPy, which matplotlib and the layouts need)
+tk = messagebox = ttk = Figure = FigureCanvasTkAgg = LineCollection = None
+
+
+def load_gui_toolkit():
+    global tk, messagebox, ttk, Figure, FigureCanvasTkAgg, LineCollection
+    import tkinter as tk
+    from tkinter import messagebox, ttk
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+
+class CSRGraph:
+    # Compressed sparse row storage: the neighbors of node u are targets[offsets[u]:offsets[u + 1]]
+    # with the matching link costs in weights[offsets[u]:offsets[u + 1]], each row sorted by neighbor id
+    def __init__(self, num_nodes, offsets, targets, weights):
+        self.num_nodes = num_nodes
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges):
+        # Normalize every undirected edge to (low, high, weight) and sort so that each row comes out ordered
+        edges = sorted((u, v, w) if u < v else (v, u, w) for u, v, w in edges)
+
+        # Count the degree of every node and turn the counts into row offsets with a prefix sum
+        offsets = array('i', [0] * (num_nodes + 1))
+        for u, v, _ in edges:
+            offsets[u + 1] += 1
+            offsets[v + 1] += 1
+        for node in range(num_nodes):
+            offsets[node + 1] += offsets[node]
+
+        # Fill both directions of each edge into its row, advancing a per-row write cursor.
+        # Because the edges are sorted, lower neighbors of a node arrive before its higher ones and rows stay ordered
+        targets = array('i', [0] * offsets[num_nodes])
+        weights = array('i', [0] * offsets[num_nodes])
+        cursor = array('i', offsets[:num_nodes])
+        for u, v, w in edges:
+            targets[cursor[u]] = v
+            weights[cursor[u]] = w
+            cursor[u] += 1
+            targets[cursor[v]] = u
+            weights[cursor[v]] = w
+            cursor[v] += 1
+
+        return cls(num_nodes, offsets, targets, weights)
+
+    @property
+    def num_edges(self):
+        # Every undirected edge is stored once in each direction
+        return len(self.targets) // 2
+
+    def neighbors(self, node):
+        # Iterate (neighbor, weight) pairs of a node straight from the row slices
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def degree(self, node):
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def _position(self, u, v):
+        # Binary search the sorted row of u for v, returning its index or -1 if the edge is absent
+        start, end = self.offsets[u], self.offsets[u + 1]
+        position = bisect_left(self.targets, v, start, end)
+        if position < end and self.targets[position] == v:
+            return position
+        return -1
+
+    def weight(self, u, v):
+        # Return the link cost between u and v, or 0 when they are not connected (same as the matrix)
+        position = self._position(u, v)
+        return self.weights[position] if position >= 0 else 0
+
+    def edges(self):
+        # Yield every undirected edge once as (u, v, weight) with u < v
+        for u in range(self.num_nodes):
+            for v, w in self.neighbors(u):
+                if u < v:
+                    yield u, v, w
+
+    def set_edge(self, u, v, weight):
+        # Changing the cost of an existing link is done in place, new links need the rows rebuilt
+        position = self._position(u, v)
+        if position >= 0:
+            self.weights[position] = weight
+            self.weights[self._position(v, u)] = weight
+        else:
+            self._rebuild(list(self.edges()) + [(u, v, weight)])
+
+    def remove_edge(self, u, v):
+        # Removing a link shifts every following row, so rebuild the arrays without it
+        if self._position(u, v) >= 0:
+            self._rebuild([edge for edge in self.edges() if {edge[0], edge[1]} != {u, v}])
+
+    def _rebuild(self, edges):
+        rebuilt = CSRGraph.from_edges(self.num_nodes, edges)
+        self.offsets, self.targets, self.weights = rebuilt.offsets, rebuilt.targets, rebuilt.weights
+
+    def edge_sources(self):
+        # Row index of every stored link, turning the CSR arrays into a directed edge list (edge_sources, targets, weights)
+        sources = array('i', [0] * len(self.targets))
+        for node in range(self.num_nodes):
+            sources[self.offsets[node]:self.offsets[node + 1]] = array('i', [node]) * self.degree(node)
+        return sources
+
+    def to_csr(self):
+        # Already in CSR form, shortest-path kernels can use the arrays directly
+        return self
+
+    def to_numpy(self):
+        # Dense num_nodes x num_nodes NumPy adjacency matrix, scattered straight from the CSR arrays
+        matrix = np.zeros((self.num_nodes, self.num_nodes), dtype=np.int64)
+        rows = np.repeat(np.arange(self.num_nodes), np.diff(np.asarray(self.offsets)))
+        matrix[rows, np.asarray(self.targets)] = self.weights
+        return matrix
+
+    def to_matrix(self):
+        # Expand into the dense num_nodes x num_nodes adjacency matrix
+        matrix = [[0] * self.num_nodes for _ in range(self.num_nodes)]
+        for u in range(self.num_nodes):
+            row = matrix[u]
+            for v, w in self.neighbors(u):
+                row[v] = w
+        return matrix
+
+
+class AdjacencyListGraph:
+    # Mutable storage keeping one {neighbor: weight} dictionary per node
+    def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self.adjacency = [{} for _ in range(num_nodes)]
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges):
+        graph = cls(num_nodes)
+        for u, v, w in edges:
+            graph.set_edge(u, v, w)
+        return graph
+
+    @property
+    def num_edges(self):
+        return sum(len(links) for links in self.adjacency) // 2
+
+    def neighbors(self, node):
+        return self.adjacency[node].items()
+
+    def degree(self, node):
+        return len(self.adjacency[node])
+
+    def weight(self, u, v):
+        return self.adjacency[u].get(v, 0)
+
+    def edges(self):
+        for u in range(self.num_nodes):
+            for v, w in self.adjacency[u].items():
+                if u < v:
+                    yield u, v, w
+
+    def set_edge(self, u, v, weight):
+        self.adjacency[u][v] = weight
+        self.adjacency[v][u] = weight
+
+    def remove_edge(self, u, v):
+        self.adjacency[u].pop(v, None)
+        self.adjacency[v].pop(u, None)
+
+    def to_csr(self):
+        # Snapshot the dictionaries into CSR arrays for the shortest-path kernels
+        return CSRGraph.from_edges(self.num_nodes, self.edges())
+
+    def to_numpy(self):
+        return self.to_csr().to_numpy()
+
+    def to_matrix(self):
+        matrix = [[0] * self.num_nodes for _ in range(self.num_nodes)]
+        for u in range(self.num_nodes):
+            for v, w in self.adjacency[u].items():
+                matrix[u][v] = w
+        return matrix
+
+
+class ArrayTableRow:
+    # List-like view of one row of a flat num_nodes x num_nodes integer array (array, memoryview or mmap),
+    # where sentinel entries (-1 unless given) read back as missing (infinity for distances, None for hops and
+    # predecessors)
+    __slots__ = ("data", "start", "size", "missing", "sentinel")
+
+    def __init__(self, data, start, size, missing, sentinel=-1):
+        self.data = data
+        self.start = start
+        self.size = size
+        self.missing = missing
+        self.sentinel = sentinel
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.tolist()[index]
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        value = self.data[self.start + index]
+        return self.missing if value == self.sentinel else value
+
+    def __setitem__(self, index, value):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        if value is None or value == float('inf'):
+            value = self.sentinel
+        elif value == self.sentinel:
+            raise OverflowError(f"{value} collides with the unreachable marker of the table")
+        self.data[self.start + index] = value
+
+    def tolist(self):
+        missing, sentinel = self.missing, self.sentinel
+        return [missing if value == sentinel else value for value in self.data[self.start:self.start + self.size]]
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __eq__(self, other):
+        return self.tolist() == list(other)
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+
+class ForwardingRow(Mapping):
+    # {dest: next_hop} view of one row of a next-hop array, leaving out the source itself like the dict tables
+    def __init__(self, row, src):
+        self.row = row
+        self.src = src
+
+    def __getitem__(self, dest):
+        if dest == self.src or not isinstance(dest, int) or not 0 <= dest < len(self.row):
+            raise KeyError(dest)
+        return self.row[dest]
+
+    def __setitem__(self, dest, hop):
+        if dest == self.src:
+            raise KeyError(dest)
+        self.row[dest] = hop
+
+    def __iter__(self):
+        return (dest for dest in range(len(self.row)) if dest != self.src)
+
+    def __len__(self):
+        return len(self.row) - 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+# Unreachable marker of each distance array type: the top of the unsigned types, -1 for the signed int64 fallback
+DISTANCE_SENTINELS = {"H": 0xFFFF, "I": 0xFFFFFFFF, "q": -1}
+
+
+def distance_typecode(bound):
+    # Narrowest distance array type that holds every distance up to bound below its unreachable marker
+    for typecode in ("H", "I"):
+        if bound < DISTANCE_SENTINELS[typecode]:
+            return typecode
+    return "q"
+
+
+class ArrayTable(Mapping):
+    # {src: row} view over a flat num_nodes x num_nodes integer array, read and written like the dict-of-rows tables
+    # without unpacking it into Python objects. With forwarding=True the rows are {dest: next_hop} mappings.
+    # Entries equal to sentinel are missing; distance tables use the narrowest type of DISTANCE_SENTINELS and widen
+    # themselves when a longer distance has to be stored
+    def __init__(self, data, num_nodes, missing, forwarding=False, sentinel=-1):
+        self.data = data
+        self.num_nodes = num_nodes
+        self.missing = missing
+        self.forwarding = forwarding
+        self.sentinel = sentinel
+
+    @classmethod
+    def empty(cls, num_nodes, typecode, missing, forwarding=False):
+        # Table with every entry missing, int32 ('i') for hops and predecessors or a DISTANCE_SENTINELS type
+        sentinel = DISTANCE_SENTINELS.get(typecode, -1)
+        return cls(array(typecode, [sentinel]) * (num_nodes * num_nodes), num_nodes, missing, forwarding, sentinel)
+
+    @property
+    def typecode(self):
+        return self.data.typecode if isinstance(self.data, array) else self.data.format
+
+    def reserve(self, bound):
+        # Widen a distance table until distances up to bound fit below its unreachable marker
+        while self.sentinel != -1 and bound >= self.sentinel:
+            old = self.sentinel
+            typecode = "I" if self.typecode == "H" else "q"
+            self.sentinel = DISTANCE_SENTINELS[typecode]
+            self.data = array(typecode, [self.sentinel if value == old else value for value in self.data])
+
+    def __getitem__(self, src):
+        if not isinstance(src, int) or not 0 <= src < self.num_nodes:
+            raise KeyError(src)
+        row = ArrayTableRow(self.data, src * self.num_nodes, self.num_nodes, self.missing, self.sentinel)
+        return ForwardingRow(row, src) if self.forwarding else row
+
+    def __setitem__(self, src, values):
+        # Store a whole row given as a list over all nodes, with infinity or None for missing entries
+        if not isinstance(src, int) or not 0 <= src < self.num_nodes:
+            raise KeyError(src)
+        row = [-1 if value is None or value == float('inf') else value for value in values]
+        if len(row) != self.num_nodes:
+            raise ValueError(f"Expected a row of {self.num_nodes} entries, got {len(row)}")
+        if self.sentinel != -1:
+            self.reserve(max(row, default=0))
+            row = [self.sentinel if value < 0 else value for value in row]
+        self.data[src * self.num_nodes:(src + 1) * self.num_nodes] = array(self.typecode, row)
+
+    def __iter__(self):
+        return iter(range(self.num_nodes))
+
+    def __len__(self):
+        return self.num_nodes
+
+    def assign_numpy(self, matrix, missing):
+        # Replace every entry with a num_nodes x num_nodes NumPy matrix, the boolean matrix missing marking the entries
+        # to store as missing, in one conversion instead of row by row
+        if self.sentinel != -1:
+            self.reserve(int(matrix[~missing].max(initial=0)))
+        packed = np.where(missing, self.sentinel, matrix).astype(np.dtype(self.typecode))
+        self.data = array(self.typecode, packed.tobytes())
+
+    def to_numpy(self):
+        # num_nodes x num_nodes NumPy view sharing the array, missing entries left at the sentinel
+        return np.frombuffer(self.data, dtype=np.dtype(self.typecode)).reshape(self.num_nodes, self.num_nodes)
+
+    def nbytes(self):
+        return len(self.data) * self.data.itemsize
+
+
+class MultipathRow(Mapping):
+    # {dest: (next hops...)} view of one source of a MultipathTable, leaving out the source itself
+    def __init__(self, table, src):
+        self.table = table
+        self.src = src
+
+    def __getitem__(self, dest):
+        if dest == self.src or not isinstance(dest, int) or not 0 <= dest < self.table.num_nodes:
+            raise KeyError(dest)
+        return self.table.next_hops(self.src, dest)
+
+    def __iter__(self):
+        return (dest for dest in range(self.table.num_nodes) if dest != self.src)
+
+    def __len__(self):
+        return self.table.num_nodes - 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class MultipathTable(Mapping):
+    # ECMP forwarding: every equal-cost next hop from each source towards each destination, read as
+    # table[src][dest] -> tuple of next hops (empty when unreachable). Each source keeps its neighbors at computation
+    # time and one bitmask per destination over them, packed little-endian into width = ceil(degree / 8) bytes
     def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self.neighbors = {}
+        self.widths = {}
+        self.rows = {}
+
+    def set_row(self, src, neighbors, packed):
+        self.neighbors[src] = tuple(neighbors)
+        self.widths[src] = mask_width(len(neighbors))
+        self.rows[src] = packed
+
+    def mask(self, src, dest):
+        width = self.widths[src]
+        return int.from_bytes(self.rows[src][dest * width:(dest + 1) * width], "little")
+
+    def next_hops(self, src, dest):
+        mask = self.mask(src, dest)
+        neighbors = self.neighbors[src]
+        hops = []
+        while mask:
+            low = mask & -mask
+            hops.append(neighbors[low.bit_length() - 1])
+            mask ^= low
+        return tuple(hops)
+
+    def select(self, src, dest, flow):
+        # Next hop of a flow at src: its hash picks one of the equal-cost next hops, None when unreachable
+        hops = self.next_hops(src, dest)
+        return hops[flow_hash(flow, src) % len(hops)] if hops else None
+
+    def nbytes(self):
+        # Size of the packed masks
+        return sum(len(row) for row in self.rows.values())
+
+    def __getitem__(self, src):
+        if src not in self.rows:
+            raise KeyError(src)
+        return MultipathRow(self, src)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def mask_width(degree):
+    # Bytes per packed ECMP mask, at least one so that every destination has an entry
+    return max(1, -(-degree // 8))
+
+
+def dijkstra_csr(offsets, targets, weights, src, distances, heap, first_hops=None, parents=None, counters=None):
+    # Binary-heap Dijkstra over CSR arrays in O((V + E) log V).
+    # distances must come in filled with infinity and is updated in place, heap must be empty and is left empty.
+    # When first_hops and parents lists are given, the first hop and the predecessor of every node are recorded too,
+    # see take_direct_links for the tie-breaking between equal-cost first hops.
+    # A counters dict accumulates relaxations (links examined) and heap pushes. The heap is drained, so every pushed
+    # entry, stale ones included, is popped once and the pops would only repeat the pushes
+    distances[src] = 0
+    heap.append((0, src))
+    relaxations = pushes = 0
+
+    if first_hops is None:
+        while heap:
+            # Pop the closest node, skipping stale heap entries left behind by later improvements
+            dist, node = heappop(heap)
+            if dist > distances[node]:
+                continue
+
+            # Relax every link leaving the node
+            start, end = offsets[node], offsets[node + 1]
+            relaxations += end - start
+            for neighbor, weight in zip(targets[start:end], weights[start:end]):
+                new_dist = dist + weight
+                if new_dist < distances[neighbor]:
+                    distances[neighbor] = new_dist
+                    heappush(heap, (new_dist, neighbor))
+                    pushes += 1
+
+        if counters is not None:
+            count_heap_operations(counters, relaxations, pushes)
+        return distances
+
+    while heap:
+        dist, node = heappop(heap)
+        if dist > distances[node]:
+            continue
+
+        start, end = offsets[node], offsets[node + 1]
+        relaxations += end - start
+        for neighbor, weight in zip(targets[start:end], weights[start:end]):
+            new_dist = dist + weight
+            if new_dist > distances[neighbor]:
+                continue
+
+            # Leaving the source the first hop is the neighbor itself, otherwise it is inherited from the node
+            hop = neighbor if node == src else first_hops[node]
+
+            if new_dist < distances[neighbor]:
+                distances[neighbor] = new_dist
+                first_hops[neighbor] = hop
+                parents[neighbor] = node
+                heappush(heap, (new_dist, neighbor))
+                pushes += 1
+            elif hop < first_hops[neighbor]:
+                # Equal cost: the node is already final, so its first hop can be adopted without re-queueing
+                first_hops[neighbor] = hop
+                parents[neighbor] = node
+
+    start, end = offsets[src], offsets[src + 1]
+    take_direct_links(zip(targets[start:end], weights[start:end]), distances, first_hops)
+    if counters is not None:
+        count_heap_operations(counters, relaxations, pushes)
+    return distances
+
+
+def count_heap_operations(counters, relaxations, pushes):
+    # Add one Dijkstra run to a counters dict, the pushes include the source entry
+    counters["relaxations"] = counters.get("relaxations", 0) + relaxations
+    counters["heap_pushes"] = counters.get("heap_pushes", 0) + pushes + 1
+
+
+def dijkstra_ecmp_csr(offsets, targets, weights, src, distances, heap, first_hops, parents, masks, counters=None):
+    # dijkstra_csr with paths that also collects every equal-cost first hop in the same pass. masks must come in as
+    # zeros and receives one bitmask per node over the links of src (bit i for the i-th neighbor in its CSR row).
+    # A node's mask is the union of the masks of its shortest-path predecessors, which are all settled before it
+    distances[src] = 0
+    heap.append((0, src))
+    relaxations = pushes = 0
+    src_start = offsets[src]
+
+    while heap:
+        dist, node = heappop(heap)
+        if dist > distances[node]:
+            continue
+
+        start, end = offsets[node], offsets[node + 1]
+        relaxations += end - start
+        for position in range(start, end):
+            neighbor = targets[position]
+            new_dist = dist + weights[position]
+            if new_dist > distances[neighbor]:
+                continue
+
+            if node == src:
+                hop, mask = neighbor, 1 << (position - src_start)
+            else:
+                hop, mask = first_hops[node], masks[node]
+
+            if new_dist < distances[neighbor]:
+                distances[neighbor] = new_dist
+                first_hops[neighbor] = hop
+                parents[neighbor] = node
+                masks[neighbor] = mask
+                heappush(heap, (new_dist, neighbor))
+                pushes += 1
+            else:
+                masks[neighbor] |= mask
+                if hop < first_hops[neighbor]:
+                    first_hops[neighbor] = hop
+                    parents[neighbor] = node
+
+    take_direct_links(zip(targets[src_start:offsets[src + 1]], weights[src_start:offsets[src + 1]]), distances,
+                      first_hops)
+    if counters is not None:
+        count_heap_operations(counters, relaxations, pushes)
+    return distances
+
+
+def pack_masks(masks, width):
+    # Little-endian fixed-width bytes of a list of bitmasks
+    return b"".join(mask.to_bytes(width, "little") for mask in masks)
+
+
+def ecmp_masks_python(offsets, targets, weights, src, routing_table, width):
+    # Packed ECMP masks of src derived from finished distance rows: neighbor i is an equal-cost first hop towards d
+    # when the link to it plus its distance to d equals the distance of src to d
+    own = routing_table[src]
+    masks = [0] * len(own)
+    for index, position in enumerate(range(offsets[src], offsets[src + 1])):
+        through, weight, bit = routing_table[targets[position]], weights[position], 1 << index
+        for dest, dist in enumerate(own):
+            if dest != src and dist != float('inf') and through[dest] + weight == dist:
+                masks[dest] |= bit
+    return pack_masks(masks, width)
+
+
+def ecmp_masks_numpy(offsets, targets, weights, src, matrix, width):
+    # ecmp_masks_python over a float64 distance matrix: one comparison per link of src and destination at once,
+    # packed eight neighbors per byte
+    start, end = offsets[src], offsets[src + 1]
+    own = matrix[src]
+    through = matrix[np.asarray(targets[start:end], dtype=np.int64)]
+    equal = (through + np.asarray(weights[start:end], dtype=np.float64)[:, None] == own) & np.isfinite(own)
+    equal[:, src] = False
+    rows = np.zeros((width, len(own)), dtype=np.uint8)
+    rows[:-(-(end - start) // 8)] = np.packbits(equal, axis=0, bitorder="little")
+    return rows.T.tobytes()
+
+
+def flow_hash(flow, node):
+    # 64-bit mix of a flow key and the deciding node (MurmurHash3 finalizer). Salting with the node makes every router
+    # split flows independently instead of all of them repeating the same choice
+    value = (flow * 0x9E3779B97F4A7C15 + node) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 33)) * 0xFF51AFD7ED558CCD) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 33)) * 0xC4CEB9FE1A85EC53) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 33)
+
+
+def bidirectional_dijkstra_csr(offsets, targets, weights, src, dst):
+    # Point-to-point shortest path growing one Dijkstra search from each end over the undirected CSR rows until their
+    # frontiers meet. Only the nodes the two searches touch are stored, so nothing of size V is allocated.
+    # Returns (cost, path), with (inf, []) when dst is unreachable
+    if src == dst:
+        return 0, [src]
+
+    dists = ({src: 0}, {dst: 0})
+    parents = ({src: None}, {dst: None})
+    heaps = ([(0, src)], [(0, dst)])
+    best, meeting = float('inf'), None
+
+    # Once the two closest frontier nodes together are no shorter than the best meeting, nothing can improve it
+    while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        dist, node = heappop(heaps[side])
+        if dist > dists[side][node]:
+            continue
+        own, other = dists[side], dists[1 - side]
+        start, end = offsets[node], offsets[node + 1]
+        for neighbor, weight in zip(targets[start:end], weights[start:end]):
+            new_dist = dist + weight
+            if new_dist < own.get(neighbor, float('inf')):
+                own[neighbor] = new_dist
+                parents[side][neighbor] = node
+                heappush(heaps[side], (new_dist, neighbor))
+                if neighbor in other and new_dist + other[neighbor] < best:
+                    best, meeting = new_dist + other[neighbor], neighbor
+
+    if meeting is None:
+        return float('inf'), []
+
+    # Walk from the meeting node back to the source, then on to the destination
+    path = []
+    node = meeting
+    while node is not None:
+        path.append(node)
+        node = parents[0][node]
+    path.reverse()
+    node = parents[1][meeting]
+    while node is not None:
+        path.append(node)
+        node = parents[1][node]
+    return best, path
+
+
+def prefer_first_hop(dest, candidate, current):
+    # Tie-breaking rule between equal-cost first hops towards dest: a direct link to the destination wins,
+    # after that the lower numbered neighbor. Example choose a-4-b rather then a-3-c-1-b
+    if current == dest:
+        return False
+    return candidate == dest or candidate < current
+
+
+def take_direct_links(links, distances, first_hops):
+    # prefer_first_hop for the tables of one source: the kernels relax with the lowest numbered first hop among the
+    # equal-cost predecessors of every node, since that is what passes down the tree, and only once the run is done do
+    # the destinations whose direct link (neighbor, weight) of the source is a shortest route switch to that link
+    for neighbor, weight in links:
+        if weight == distances[neighbor]:
+            first_hops[neighbor] = neighbor
+
+
+def bellman_ford_edges(sources, targets, weights, src, distances, first_hops=None, parents=None, counters=None):
+    # Pass-based Bellman-Ford over a directed edge list that stops as soon as a full pass changes nothing.
+    # distances must come in filled with infinity, the number of passes made is returned.
+    # A counters dict accumulates the passes and the relaxations (every link once per pass)
+    distances[src] = 0
+    num_nodes = len(distances)
+    passes = 0
+
+    for _ in range(num_nodes - 1):
+        passes += 1
+        changed = False
+
+        for u, v, weight in zip(sources, targets, weights):
+            new_dist = distances[u] + weight
+            if new_dist < distances[v]:
+                distances[v] = new_dist
+                if first_hops is not None:
+                    first_hops[v] = v if u == src else first_hops[u]
+                    parents[v] = u
+                changed = True
+
+            # Unreached nodes compare inf == inf, so only finite ties can move the first hop
+            elif first_hops is not None and new_dist == distances[v] and v != src and new_dist != float('inf'):
+                hop = v if u == src else first_hops[u]
+                if hop < first_hops[v]:
+                    first_hops[v] = hop
+                    parents[v] = u
+                    changed = True
+                elif hop == first_hops[v] and (distances[u], u) < (distances[parents[v]], parents[v]):
+                    # Same hop: keep the predecessor Dijkstra settles first, nothing else depends on it
+                    parents[v] = u
+
+        # Nothing moved in this pass, so no later pass can move anything either
+        if not changed:
+            break
+
+    if first_hops is not None:
+        take_direct_links(((v, weight) for u, v, weight in zip(sources, targets, weights) if u == src), distances,
+                          first_hops)
+    if counters is not None:
+        counters["bellman_ford_passes"] = counters.get("bellman_ford_passes", 0) + passes
+        counters["relaxations"] = counters.get("relaxations", 0) + passes * len(sources)
+    return passes
+
+
+def spfa_csr(offsets, targets, weights, src, distances, queue, in_queue, first_hops=None, parents=None, counters=None):
+    # Queue-driven Bellman-Ford (SPFA): only links out of nodes whose distance or first hop changed are relaxed.
+    # distances must come in filled with infinity, queue empty and in_queue all zero, both are left that way.
+    # Returns the number of nodes taken off the queue, a counters dict accumulates them with the relaxations
+    distances[src] = 0
+    queue.append(src)
+    in_queue[src] = 1
+    pops = 0
+    relaxations = 0
+
+    while queue:
+        u = queue.popleft()
+        in_queue[u] = 0
+        pops += 1
+        dist = distances[u]
+
+        start, end = offsets[u], offsets[u + 1]
+        relaxations += end - start
+        for v, weight in zip(targets[start:end], weights[start:end]):
+            new_dist = dist + weight
+            if new_dist < distances[v]:
+                distances[v] = new_dist
+                if first_hops is not None:
+                    first_hops[v] = v if u == src else first_hops[u]
+                    parents[v] = u
+            elif first_hops is not None and new_dist == distances[v] and v != src:
+                hop = v if u == src else first_hops[u]
+                if hop > first_hops[v]:
+                    continue
+                if hop == first_hops[v]:
+                    # Same hop: keep the predecessor Dijkstra settles first, nothing else depends on it so no re-queue
+                    if (dist, u) < (distances[parents[v]], parents[v]):
+                        parents[v] = u
+                    continue
+                first_hops[v] = hop
+                parents[v] = u
+            else:
+                continue
+
+            # The node improved, so its own links have to be relaxed again
+            if not in_queue[v]:
+                queue.append(v)
+                in_queue[v] = 1
+
+    if first_hops is not None:
+        start, end = offsets[src], offsets[src + 1]
+        take_direct_links(zip(targets[start:end], weights[start:end]), distances, first_hops)
+    if counters is not None:
+        counters["queue_pops"] = counters.get("queue_pops", 0) + pops
+        counters["relaxations"] = counters.get("relaxations", 0) + relaxations
+    return pops
+
+
+def floyd_warshall_numpy(graph, matrix, with_paths=False, progress=None):
+    # Vectorized Floyd-Warshall over a dense NumPy adjacency matrix, every pivot is one broadcast minimum over the whole
+    # distance matrix. Unreachable pairs are left at numpy_unreachable() of the returned dtype.
+    # With with_paths the first hop and predecessor matrices are derived as well, following the same tie-breaking as
+    # dijkstra_csr, with -1 where there is no entry. progress(done, total) is called after every pivot
+    num_nodes = len(matrix)
+
+    # Half the memory traffic with int32 whenever the longest possible path still fits below its sentinel
+    dtype = np.int32 if int(matrix.max(initial=0)) * num_nodes < numpy_unreachable(np.int32) else np.int64
+    unreachable = numpy_unreachable(dtype)
+    dist = np.where(matrix > 0, matrix, unreachable).astype(dtype)
+    np.fill_diagonal(dist, 0)
+    for pivot in range(num_nodes):
+        np.minimum(dist, dist[:, pivot, None] + dist[pivot], out=dist)
+        if progress:
+            progress(pivot + 1, num_nodes)
+
+    if not with_paths:
+        return dist
+
+    csr = graph.to_csr()
+    offsets = np.asarray(csr.offsets)
+    targets = np.asarray(csr.targets)
+    weights = np.asarray(csr.weights)
+    nodes = np.arange(num_nodes)
+
+    # Links are undirected, so dist is symmetric and dist[d] also holds the distances from every source to d.
+    # The path matrices are therefore built by destination: row d of into_hops holds the first hop of every source
+    # towards d, which lets each destination gather the contiguous rows of its neighbors.
+    # Like the kernels (see take_direct_links) every destination first gets the lowest first hop among its shortest-path
+    # predecessors, a source being the predecessor over a direct link that is a shortest path, and only at the end do
+    # those direct links take over. num_nodes stands for "no hop yet" so that min() never picks it
+    direct = (matrix > 0) & (matrix == dist)
+    reachable = dist < unreachable
+    np.fill_diagonal(reachable, False)
+    into_hops = np.where(direct, nodes[:, None], num_nodes).astype(np.int32)
+
+    # Each sweep lowers the first hop of every destination to the lowest one among its shortest-path predecessors.
+    # Sweeping until nothing changes covers every depth of the shortest-path trees
+    changed = True
+    while changed:
+        changed = False
+        for dest in range(num_nodes):
+            start, end = offsets[dest], offsets[dest + 1]
+            neighbors = targets[start:end]
+            preds = dist[neighbors] + weights[start:end, None] == dist[dest]
+            candidate = np.where(preds, into_hops[neighbors], num_nodes).min(axis=0, initial=num_nodes)
+            updated = np.where(reachable[dest], np.minimum(candidate, into_hops[dest]), into_hops[dest])
+            if not np.array_equal(updated, into_hops[dest]):
+                into_hops[dest] = updated
+                changed = True
+
+    # The predecessor is the one Dijkstra settles first (lowest distance, then lowest id) among those offering the hop,
+    # the source itself offering the destination
+    into_parents = np.full((num_nodes, num_nodes), -1, dtype=np.int32)
+    for dest in range(num_nodes):
+        start, end = offsets[dest], offsets[dest + 1]
+        neighbors = targets[start:end]
+        if not len(neighbors):
+            continue
+        offered = (into_hops[neighbors] == into_hops[dest]) | ((neighbors[:, None] == nodes) & (into_hops[dest] == dest))
+        preds = (dist[neighbors] + weights[start:end, None] == dist[dest]) & offered
+        keys = np.where(preds, dist[neighbors].astype(np.int64) * num_nodes + neighbors[:, None], np.iinfo(np.int64).max)
+        into_parents[dest] = np.where(reachable[dest], neighbors[keys.argmin(axis=0)], -1)
+
+    into_hops = np.where(direct, nodes[:, None], into_hops)
+    into_hops[into_hops == num_nodes] = -1
+    return dist, into_hops.T, into_parents.T
+
+
+# Route analytics work on sink trees: for a destination d the next hops forwarding_table[u][d] of all nodes u form a
+# tree rooted at d (a predecessor array read towards the root), and the route of every source to d follows it. Hop
+# counts and link loads of all routes to d therefore take O(V) per destination instead of one walk per pair
+
+
+def sink_tree_hops(toward, root):
+    # Hop counts of every node to root over the next hops toward (None where unreachable), None for unreachable nodes.
+    # Each node is resolved once by walking up to the first node whose count is already known
+    num_nodes = len(toward)
+    hops = [None] * num_nodes
+    hops[root] = 0
+    for node in range(num_nodes):
+        if hops[node] is not None or toward[node] is None:
+            continue
+        chain = []
+        while hops[node] is None and toward[node] is not None:
+            chain.append(node)
+            if len(chain) > num_nodes:
+                raise ValueError(f"The forwarding tables loop on the way to {root}")
+            node = toward[node]
+        count = hops[node]
+        if count is None:
+            continue
+        for member in reversed(chain):
+            count += 1
+            hops[member] = count
+    return hops
+
+
+def sink_tree_loads(toward, hops, loads):
+    # Add to loads[(u, v)] (u < v) the number of routes to the root of the sink tree crossing every link: the size of
+    # the subtree hanging below it. Nodes are visited deepest first so every subtree is complete when it is passed up
+    num_nodes = len(toward)
+    levels = [[] for _ in range(max((h for h in hops if h is not None), default=0) + 1)]
+    for node, count in enumerate(hops):
+        if count:
+            levels[count].append(node)
+
+    sizes = [1] * num_nodes
+    for level in reversed(levels):
+        for node in level:
+            parent = toward[node]
+            sizes[parent] += sizes[node]
+            link = (node, parent) if node < parent else (parent, node)
+            loads[link] = loads.get(link, 0) + sizes[node]
+
+
+def sink_tree_hops_numpy(toward):
+    # Hop counts of all sink trees at once, row d of toward holding the next hops towards d (-1 where there is none).
+    # Pointer jumping: every round adds the count of a node's current ancestor and jumps to that ancestor's ancestor,
+    # so log2(depth) rounds of whole-matrix gathers cover the deepest route. Unreachable nodes end up at -1
+    ancestors = toward.copy()
+    hops = (ancestors >= 0).astype(np.int32)
+    valid = ancestors >= 0
+    while valid.any():
+        index = np.where(valid, ancestors, 0)
+        hops += np.where(valid, np.take_along_axis(hops, index, axis=1), 0)
+        ancestors = np.where(valid, np.take_along_axis(ancestors, index, axis=1), -1)
+        valid = ancestors >= 0
+
+    hops[(toward < 0) & ~np.eye(len(toward), dtype=bool)] = -1
+    return hops
+
+
+def sink_tree_loads_numpy(toward, hops, link_keys):
+    # Routes crossing every link over all sink trees, for the undirected links given as sorted u * num_nodes + v keys
+    # (u < v). Entries are handled level by level from the deepest, each level passing its subtree sizes up at once
+    num_nodes = len(toward)
+    sizes = np.ones(toward.shape, dtype=np.int64)
+    flat_hops = hops.ravel()
+    order = np.argsort(-flat_hops, kind="stable")
+    order = order[flat_hops[order] > 0]
+    boundaries = np.flatnonzero(np.diff(flat_hops[order])) + 1
+
+    for level in np.split(order, boundaries):
+        dests, nodes = np.divmod(level, num_nodes)
+        np.add.at(sizes, (dests, toward[dests, nodes]), sizes[dests, nodes])
+
+    # Every node with a next hop sends its subtree over the link to it
+    dests, nodes = np.divmod(order, num_nodes)
+    parents = toward[dests, nodes].astype(np.int64)
+    keys = np.minimum(nodes, parents) * num_nodes + np.maximum(nodes, parents)
+    return np.bincount(np.searchsorted(link_keys, keys), weights=sizes[dests, nodes],
+                       minlength=len(link_keys)).astype(np.int64)
+
+
+# State of a routing worker process: the CSR arrays copied once out of shared memory and views onto the shared tables
+_routing_worker = {}
+
+
+def _shared_table_views(buffer, num_nodes, with_paths):
+    # Views onto the shared table block: int64 distances followed by int32 first hops and predecessors, row-major
+    # num_nodes x num_nodes each, with -1 for unreachable / no entry
+    cells = num_nodes * num_nodes
+    views = [buffer[:8 * cells].cast('q')]
+    if with_paths:
+        views.append(buffer[8 * cells:12 * cells].cast('i'))
+        views.append(buffer[12 * cells:16 * cells].cast('i'))
+    return views
+
+
+def _attach_routing_worker(graph_name, tables_name, num_nodes, num_links, algorithm, with_paths):
+    # Pool initializer: attach to the shared topology and tables once per worker instead of pickling them per task
+    graph_memory = SharedMemory(name=graph_name)
+    tables_memory = SharedMemory(name=tables_name)
+    links = graph_memory.buf.cast('i')
+    _routing_worker.update(
+        offsets=array('i', links[:num_nodes + 1]),
+        targets=array('i', links[num_nodes + 1:num_nodes + 1 + num_links]),
+        weights=array('i', links[num_nodes + 1 + num_links:num_nodes + 1 + 2 * num_links]),
+        tables=_shared_table_views(tables_memory.buf, num_nodes, with_paths),
+        memory=(graph_memory, tables_memory),  # Keeps the segments mapped for the life of the worker
+        num_nodes=num_nodes, algorithm=algorithm, with_paths=with_paths)
+    links.release()
+
+
+def _routing_worker_chunk(first_src, last_src):
+    # Compute the shortest-path trees of sources first_src..last_src - 1 and write their rows into the shared tables.
+    # The kernel counters of the chunk are returned, they are small enough to pickle
+    state = _routing_worker
+    offsets, targets, weights = state["offsets"], state["targets"], state["weights"]
+    num_nodes = state["num_nodes"]
+    heap = []
+    queue = deque()
+    in_queue = bytearray(num_nodes)
+    counters = {}
+
+    for src in range(first_src, last_src):
+        distances = [float('inf')] * num_nodes
+        first_hops = parents = None
+        if state["with_paths"]:
+            first_hops = [None] * num_nodes
+            parents = [None] * num_nodes
+
+        if state["algorithm"] == "Link State Routing":
+            dijkstra_csr(offsets, targets, weights, src, distances, heap, first_hops, parents, counters)
+        else:
+            spfa_csr(offsets, targets, weights, src, distances, queue, in_queue, first_hops, parents, counters)
+
+        row = slice(src * num_nodes, (src + 1) * num_nodes)
+        state["tables"][0][row] = array('q', [-1 if dist == float('inf') else dist for dist in distances])
+        if first_hops is not None:
+            state["tables"][1][row] = array('i', [-1 if hop is None else hop for hop in first_hops])
+            state["tables"][2][row] = array('i', [-1 if parent is None else parent for parent in parents])
+    return counters
+
+
+def numpy_unreachable(dtype):
+    # Distance standing for "unreachable" in NumPy distance matrices, half the range so that adding two never overflows
+    return np.iinfo(dtype).max // 2
+
+# The vectorized engine pays off on dense graphs, but keeps several num_nodes x num_nodes int64 matrices in memory
+NUMPY_MIN_NODES = 64
+NUMPY_MAX_NODES = 4000
+NUMPY_MIN_DENSITY = 0.1
+
+# Below this size starting worker processes costs more than the parallel run saves
+PARALLEL_MIN_NODES = 2000
+
+# Engines that can compute the all-pairs tables
+ROUTING_ENGINES = ("auto", "python", "numpy", "parallel")
+
+
+def random_weight(rng):
+    # Random link cost, the same 1 to 10 range for every topology model
+    return rng.randint(1, 10)
+
+
+def random_spanning_tree(num_nodes, rng):
+    # Random recursive tree over a shuffled node order: every node links to one node placed before it,
+    # which makes any topology built on top of it connected by construction
+    order = list(range(num_nodes))
+    rng.shuffle(order)
+    for i in range(1, num_nodes):
+        yield order[i], order[rng.randrange(i)]
+
+
+def sample_pairs(num_nodes, probability, rng):
+    # Yield each node pair (u, v) with u > v independently with the given probability in O(V + E) instead of O(V^2),
+    # jumping straight to the next chosen pair with geometrically distributed skips (Batagelj and Brandes)
+    if probability <= 0:
+        return
+    if probability >= 1:
+        for u in range(1, num_nodes):
+            for v in range(u):
+                yield u, v
+        return
+
+    log_miss = math.log(1 - probability)
+    u, v = 1, -1
+    while u < num_nodes:
+        v += 1 + int(math.log(1 - rng.random()) / log_miss)
+        while v >= u and u < num_nodes:
+            v -= u
+            u += 1
+        if u < num_nodes:
+            yield u, v
+
+
+def report_rows(pairs, num_nodes, progress):
+    # Pass (u, v) pairs through, calling progress(u, num_nodes) whenever u advances to a new row
+    row = 0
+    for u, v in pairs:
+        if progress and u != row:
+            row = u
+            progress(u, num_nodes)
+        yield u, v
+
+
+# Every model takes progress(done, total), called as the nodes are worked through; it may raise to abandon the
+# generation
+
+def erdos_renyi_links(num_nodes, rng, probability=0.3, progress=None):
+    # Random spanning tree plus every other pair linked with the given probability
+    tree = {(u, v) if u > v else (v, u) for u, v in random_spanning_tree(num_nodes, rng)}
+    links = [(u, v, random_weight(rng)) for u, v in tree]
+    links.extend((u, v, random_weight(rng)) for u, v in report_rows(sample_pairs(num_nodes, probability, rng),
+                                                                    num_nodes, progress) if (u, v) not in tree)
+    return links
+
+
+def waxman_links(num_nodes, rng, alpha=0.4, beta=0.4, progress=None):
+    # Nodes placed in the unit square, a pair at distance d is linked with probability beta * exp(-d / (alpha * L))
+    # where L is the largest possible distance. Candidates are drawn at rate beta with sample_pairs and thinned
+    positions = [(rng.random(), rng.random()) for _ in range(num_nodes)]
+    scale = alpha * math.sqrt(2)
+    tree = {(u, v) if u > v else (v, u) for u, v in random_spanning_tree(num_nodes, rng)}
+    links = [(u, v, random_weight(rng)) for u, v in tree]
+    for u, v in report_rows(sample_pairs(num_nodes, beta, rng), num_nodes, progress):
+        if (u, v) not in tree and rng.random() < math.exp(-math.dist(positions[u], positions[v]) / scale):
+            links.append((u, v, random_weight(rng)))
+    return links
+
+
+def barabasi_albert_links(num_nodes, rng, links_per_node=2, progress=None):
+    # Preferential attachment: every new node links to links_per_node distinct existing nodes chosen proportionally
+    # to their degree, starting from a star so that the graph is connected throughout
+    links_per_node = max(1, min(links_per_node, num_nodes - 1))
+    links = [(0, v, random_weight(rng)) for v in range(1, min(links_per_node + 1, num_nodes))]
+    endpoints = [node for u, v, _ in links for node in (u, v)]  # Every node appears once per link it has
+    for node in range(links_per_node + 1, num_nodes):
+        if progress:
+            progress(node, num_nodes)
+        targets = set()
+        while len(targets) < links_per_node:
+            targets.add(rng.choice(endpoints))
+        for target in targets:
+            links.append((node, target, random_weight(rng)))
+            endpoints.extend((node, target))
+    return links
+
+
+def grid_links(num_nodes, rng, progress=None):
+    # Nearly square mesh filled row by row, each node linked to its right and lower neighbor
+    columns = max(1, math.isqrt(num_nodes - 1) + 1) if num_nodes > 1 else 1
+    links = []
+    for node in range(num_nodes):
+        if progress and node % columns == 0:
+            progress(node, num_nodes)
+        if (node + 1) % columns and node + 1 < num_nodes:
+            links.append((node, node + 1, random_weight(rng)))
+        if node + columns < num_nodes:
+            links.append((node, node + columns, random_weight(rng)))
+    return links
+
+
+def fat_tree_links(num_nodes, rng, progress=None):
+    # k-ary fat tree: (k/2)^2 core switches and k pods of k/2 aggregation and k/2 edge switches, with the remaining
+    # nodes as hosts spread round-robin over the edge switches. k is the smallest even number whose full tree of
+    # k^3/4 hosts holds every node, or the size below it when there are too few nodes to fill its switch layers
+    k = 2
+    while (k ** 3 + 5 * k * k) // 4 < num_nodes:
+        k += 2
+    if 5 * k * k // 4 >= num_nodes and k > 2:
+        k -= 2
+    if 5 * k * k // 4 >= num_nodes:
+        raise ValueError(f"A fat tree needs at least {5 * k * k // 4 + 1} nodes, got {num_nodes}")
+    half = k // 2
+    cores = list(range(half * half))
+    links = []
+    edge_switches = []
+    for pod in range(k):
+        first = len(cores) + pod * k
+        if progress:
+            progress(first, num_nodes)
+        aggregations = range(first, first + half)
+        edges = range(first + half, first + k)
+        edge_switches.extend(edges)
+        for i, aggregation in enumerate(aggregations):
+            links.extend((aggregation, core, random_weight(rng)) for core in cores[i * half:(i + 1) * half])
+            links.extend((aggregation, edge, random_weight(rng)) for edge in edges)
+    for i, host in enumerate(range(len(cores) + k * k, num_nodes)):
+        if progress and i % k == 0:
+            progress(host, num_nodes)
+        links.append((host, edge_switches[i % len(edge_switches)], random_weight(rng)))
+    return links
+
+
+# Topology models NetworkTopology can generate, every one connected by construction
+TOPOLOGY_MODELS = {
+    "erdos_renyi": erdos_renyi_links,
+    "waxman": waxman_links,
+    "barabasi_albert": barabasi_albert_links,
+    "grid": grid_links,
+    "fat_tree": fat_tree_links,
+}
+
+
+# Storage backends that NetworkTopology can keep its links in
+STORAGE_BACKENDS = {
+    "csr": CSRGraph,
+    "adjacency_list": AdjacencyListGraph,
+}
+
+
+# From this many nodes on the vectorized spring layout replaces NetworkX's, which builds a NetworkX graph first
+LAYOUT_NUMPY_MIN_NODES = 200
+
+
+def spring_layout_numpy(num_nodes, edges, seed=0, iterations=50, block_rows=256, progress=None):
+    # Fruchterman-Reingold force-directed layout on NumPy arrays, the same model as nx.spring_layout. Repulsion between
+    # all pairs is summed block_rows nodes at a time to bound memory, attraction works on the link arrays.
+    # progress(done, iterations) is called after every iteration
+    rng = np.random.default_rng(seed)
+    positions = rng.random((num_nodes, 2))
+    links = np.array([(i, j) for i, j, _ in edges], dtype=np.int64).reshape(-1, 2)
+    sources, targets = links[:, 0], links[:, 1]
+
+    k = 1 / math.sqrt(num_nodes)  # Optimal distance between nodes
+    temperature = 0.1  # Largest move of a node in one iteration, cooled down linearly
+    cooling = temperature / (iterations + 1)
+
+    for iteration in range(iterations):
+        if progress:
+            progress(iteration, iterations)
+        displacement = np.zeros((num_nodes, 2))
+        x, y = positions[:, 0], positions[:, 1]
+
+        # Every pair of nodes repels with k^2 / distance
+        for start in range(0, num_nodes, block_rows):
+            dx = x[start:start + block_rows, None] - x[None, :]
+            dy = y[start:start + block_rows, None] - y[None, :]
+            scale = dx * dx
+            scale += dy * dy
+            np.maximum(scale, 1e-4, out=scale)
+            np.divide(k * k, scale, out=scale)
+            displacement[start:start + block_rows, 0] += (dx * scale).sum(axis=1)
+            displacement[start:start + block_rows, 1] += (dy * scale).sum(axis=1)
+
+        # Linked nodes attract with distance^2 / k
+        delta = positions[sources] - positions[targets]
+        force = delta * (np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01) / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(targets, force[:, axis], num_nodes) - \
+                np.bincount(sources, force[:, axis], num_nodes)
+
+        # Move every node along its displacement, limited by the temperature
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 0.01)
+        positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    # Center on the origin and scale into [-1, 1] like nx.spring_layout
+    positions -= positions.mean(axis=0)
+    scale = np.abs(positions).max()
+    return positions / scale if scale > 0 else positions
+
+
+def compute_layout(num_nodes, edges, seed=0, progress=None):
+    # Node positions as a num_nodes x 2 array. Small graphs use NetworkX's spring layout, large ones the vectorized one
+    # (which reports progress per iteration)
+    if num_nodes >= LAYOUT_NUMPY_MIN_NODES:
+        return spring_layout_numpy(num_nodes, edges, seed, progress=progress)
+
+    G = nx.Graph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_edges_from((i, j) for i, j, _ in edges)
+    pos = nx.spring_layout(G, seed=seed)
+    return np.array([pos[node] for node in range(num_nodes)]).reshape(-1, 2)
+
+
+class Profiler:
+    # Instrumentation shared by a topology and its views: named phase timers, counters filled by the shortest-path
+    # kernels and, when memory is set, the tracemalloc peak of every phase above its starting allocation.
+    # Phases may nest, each one is timed and sampled on its own. Tracing allocations slows Python code down several
+    # times, so timings taken with memory sampling are only comparable with each other
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}  # Name -> [calls, total seconds, peak bytes]
+        self.counters = {}  # Name -> count, kernels add to it directly
+        self._open = []  # [start allocation, peak so far] of every running phase when sampling memory
+        self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        if self.memory:
+            self._enter_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = self._exit_memory() if self.memory else 0
+            entry = self.phases.setdefault(name, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], peak)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _enter_memory(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        # The peak is reset for the new phase, so the enclosing one keeps what it reached until now
+        current, peak = tracemalloc.get_traced_memory()
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._open.append([current, current])
+
+    def _exit_memory(self):
+        start, peak = self._open.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+            tracemalloc.reset_peak()
+        elif self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return peak - start
+
+    def stats(self):
+        # Plain dict snapshot: per phase its calls, total and mean milliseconds (and peak KB), then the counters
+        phases = {}
+        for name, (calls, total, peak) in self.phases.items():
+            phases[name] = {"calls": calls, "total_ms": round(total * 1000, 3), "mean_ms": round(total * 1000 / calls, 3)}
+            if self.memory:
+                phases[name]["peak_memory_kb"] = round(peak / 1024)
+        return {"phases": phases, "counters": dict(self.counters)}
+
+    def report(self):
+        # Human readable lines of stats(), slowest phase first
+        stats = self.stats()
+        lines = []
+        for name, phase in sorted(stats["phases"].items(), key=lambda item: -item[1]["total_ms"]):
+            line = f"{name}: {phase['total_ms']} ms in {phase['calls']} call(s)"
+            if "peak_memory_kb" in phase:
+                line += f", peak {phase['peak_memory_kb']} KB"
+            lines.append(line)
+        lines.extend(f"{name}: {value}" for name, value in sorted(stats["counters"].items()))
+        return lines
+
+    def reset(self):
+        self.phases = {}
+        self.counters = {}
+
+
+class NetworkTopology:
+    def __init__(self, num_nodes, backend="csr", model="erdos_renyi", seed=None, route_cache_size=64, graph=None,
+                 profiler=None, progress=None, **model_options):
         # Initialize the NetworkTopology class with the number of nodes
         self.num_nodes = num_nodes
-        
-        # Create an adjacency matrix representing connections between nodes, initialized with zeros
-        self.adjacency_matrix = [[0 for _ in range(num_nodes)] for _ in range(num_nodes)]
-        
-        # Generate the network topology by connecting nodes
-        self.generate_topology()
-        
-        # Initialize empty dictionaries for routing and forwarding tables
+
+        # Optional Profiler collecting phase timings and kernel counters, see profile_stats()
+        self.profiler = profiler
+
+        # Topology model and its options (e.g. probability for erdos_renyi), generated from its own random stream
+        # when a seed is given and from the global one otherwise
+        if model not in TOPOLOGY_MODELS:
+            raise ValueError(f"Unknown topology model: {model}")
+        self.model = model
+        self.model_options = model_options
+        self.random = random if seed is None else random.Random(seed)
+
+        # Select the storage backend holding the links, the dense adjacency matrix is only built on demand
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        self.backend = backend
+        self.graph = None
+        self._adjacency_matrix = None
+        self._adjacency_array = None
+        self._layout = None
+
+        # Every change of the links bumps the version, tables and cached routes are only valid for the version they
+        # were computed on
+        self.version = 0
+        self.tables_version = None
+        self._csr = None
+        self._csr_version = None
+
+        # Bounded LRU cache of lazily computed routes: shortest-path trees keyed by source, point-to-point paths by
+        # (source, destination)
+        self.route_cache_size = route_cache_size
+        self._route_cache = OrderedDict()
+        self._route_cache_version = None
+        self.route_cache_stats = {"hits": 0, "misses": 0}
+        self._sink_tree_cache = None  # (tables version, forwarding table, next hops by destination) for the analytics
+
+        # Generate the network topology by connecting nodes, unless existing links are handed in.
+        # progress(done, total) follows the generation like in generate_topology
+        if graph is None:
+            self.generate_topology(progress)
+        else:
+            self.graph = graph if isinstance(graph, STORAGE_BACKENDS[backend]) else \
+                STORAGE_BACKENDS[backend].from_edges(num_nodes, graph.edges())
+            self.version += 1
+
+        # Initialize empty dictionaries for routing, forwarding and shortest-path predecessor tables
+        self.algorithm = None  # Algorithm the tables were last computed with
+        self.engine = None  # Engine that computed them
         self.routing_table = {}
         self.forwarding_table = {}
+        self.predecessor_table = {}
+
+        # Every equal-cost next hop (ECMP), filled in the shortest-path pass when asked for and otherwise derived from
+        # the distances on first use, see ecmp_table()
+        self.multipath_table = None
+        self._multipath_version = None
+
+    @property
+    def adjacency_matrix(self):
+        # Dense num_nodes x num_nodes view of the links, built from the storage backend the first time it is used
+        if self._adjacency_matrix is None:
+            self._adjacency_matrix = self.graph.to_matrix()
+        return self._adjacency_matrix
+
+    @property
+    def adjacency_array(self):
+        # Dense NumPy int64 view of the links for the vectorized engine, built on first use like adjacency_matrix
+        if self._adjacency_array is None:
+            self._adjacency_array = self.graph.to_numpy()
+        return self._adjacency_array
+
+    def generate_topology(self, progress=None):
+        # Draw the links from the topology model, each with a random weight/cost (range: 1 to 10).
+        # Every model is connected by construction, so there is no need to check and regenerate.
+        # progress(done, total) is called as the model works through the nodes, it may raise to abandon the generation
+        with self.phase("generate_topology"):
+            edges = TOPOLOGY_MODELS[self.model](self.num_nodes, self.random, progress=progress, **self.model_options)
+
+            # Build the storage backend from the generated links and drop any stale dense view
+            self.graph = STORAGE_BACKENDS[self.backend].from_edges(self.num_nodes, edges)
+        self._adjacency_matrix = None
+        self._adjacency_array = None
+        self._layout = None
+        self.version += 1
+
+
+    def phase(self, name):
+        # Context manager timing a named phase on the profiler, doing nothing without one
+        return self.profiler.phase(name) if self.profiler else nullcontext()
+
+    def _counters(self):
+        # Counters dict the kernels accumulate into, None when not profiling
+        return self.profiler.counters if self.profiler else None
+
+    def profile_stats(self):
+        # Phase timings and counters collected so far, None when the topology has no profiler
+        return self.profiler.stats() if self.profiler else None
+
+    def is_connected(self):
+        # Start BFS from node 0 and check if all nodes are reachable
+
+        # Create a list to track visited nodes
+        visited = [False] * self.num_nodes
+
+        # Initialize a queue for BFS starting from node 0
+        queue = deque([0])
+        visited[0] = True  # Mark the starting node as visited
+
+        while queue:
+            # Dequeue a node from the front of the queue
+            node = queue.popleft()
+
+            # Iterate through all adjacent nodes
+            for adjacent, weight in self.graph.neighbors(node):
+                # Check if the node is not visited yet
+                if not visited[adjacent]:
+                    visited[adjacent] = True  # Mark the node as visited
+                    queue.append(adjacent)  # Enqueue the adjacent node
+
+        # Check if all nodes have been visited
+        return all(visited)
+
+    def dijkstra(self, src, with_paths=False):
+        # Run the heap-based Dijkstra over the CSR rows of the topology for a single source node
+        graph = self._current_csr()
+        distances = [float('inf')] * self.num_nodes  # Every node starts at infinite distance
+
+        if not with_paths:
+            dijkstra_csr(graph.offsets, graph.targets, graph.weights, src, distances, [], counters=self._counters())
+            return distances  # Return the computed shortest distances from the source node
+
+        # Also record the first hop and the predecessor of every node while relaxing
+        first_hops = [None] * self.num_nodes
+        parents = [None] * self.num_nodes
+        dijkstra_csr(graph.offsets, graph.targets, graph.weights, src, distances, [], first_hops, parents, self._counters())
+        return distances, first_hops, parents
+
+    def _empty_tables(self, with_paths, compact):
+        # Tables the all-pairs engines fill row by row: dicts of Python lists, or with compact ArrayTables of int32
+        # hops and predecessors and distances in the narrowest type holding the longest possible shortest path
+        if not compact:
+            return {}, {}, {}
+        bound = max(self._current_csr().weights, default=1) * max(self.num_nodes - 1, 1)
+        routing_table = ArrayTable.empty(self.num_nodes, distance_typecode(bound), float('inf'))
+        if not with_paths:
+            return routing_table, {}, {}
+        return routing_table, ArrayTable.empty(self.num_nodes, "i", None), ArrayTable.empty(self.num_nodes, "i", None)
+
+    def all_pairs_dijkstra(self, with_paths=False, progress=None, multipath=None, compact=False):
+        # Compute the shortest distances from every node, reusing the CSR snapshot and the heap buffer across sources.
+        # progress(done, total) is called after every source, it may raise to abandon the computation.
+        # A MultipathTable passed as multipath (with with_paths) receives the equal-cost next hops of the same runs.
+        # With compact the tables are ArrayTables, each row packed as soon as its source is done
+        graph = self._current_csr()
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        unreached = [float('inf')] * self.num_nodes  # Template row copied for each source
+        unset = [None] * self.num_nodes  # Template row for first hops and predecessors
+        heap = []  # Emptied by every run, so the same list serves all sources
+        counters = self._counters()
+
+        routing_table, first_hop_table, predecessor_table = self._empty_tables(with_paths, compact)
+        for src in range(self.num_nodes):
+            distances = unreached[:]
+            if multipath is not None:
+                first_hops = unset[:]
+                parents = unset[:]
+                masks = [0] * self.num_nodes
+                dijkstra_ecmp_csr(offsets, targets, weights, src, distances, heap, first_hops, parents, masks, counters)
+                start, end = offsets[src], offsets[src + 1]
+                multipath.set_row(src, targets[start:end], pack_masks(masks, mask_width(end - start)))
+                first_hop_table[src] = first_hops
+                predecessor_table[src] = parents
+            elif with_paths:
+                first_hops = unset[:]
+                parents = unset[:]
+                dijkstra_csr(offsets, targets, weights, src, distances, heap, first_hops, parents, counters)
+                first_hop_table[src] = first_hops
+                predecessor_table[src] = parents
+            else:
+                dijkstra_csr(offsets, targets, weights, src, distances, heap, counters=counters)
+            routing_table[src] = distances
+            if progress:
+                progress(src + 1, self.num_nodes)
+
+        if with_paths:
+            return routing_table, first_hop_table, predecessor_table
+        return routing_table
+
+    
+    def bellman_ford(self, src, with_paths=False, mode="spfa"):
+        # Run Bellman-Ford for a single source node, either queue-driven ("spfa") or as full passes over the edge list
+        # that stop early once nothing changes ("edge_list")
+        table = self.all_pairs_bellman_ford(with_paths=with_paths, mode=mode, sources=[src])
+        if with_paths:
+            return table[0][src], table[1][src], table[2][src]
+        return table[src]  # Return the computed shortest distances from the source node using Bellman-Ford algorithm
+
+    def all_pairs_bellman_ford(self, with_paths=False, mode="spfa", sources=None, progress=None, compact=False):
+        # Compute the shortest distances from every node (or the given sources) with Bellman-Ford,
+        # sharing the CSR snapshot and the queue buffers across sources. progress and compact work like in
+        # all_pairs_dijkstra
+        if mode not in ("spfa", "edge_list"):
+            raise ValueError(f"Unknown Bellman-Ford mode: {mode}")
+
+        graph = self._current_csr()
+        unreached = [float('inf')] * self.num_nodes  # Template row copied for each source
+        unset = [None] * self.num_nodes  # Template row for first hops and predecessors
+        queue = deque()
+        in_queue = bytearray(self.num_nodes)
+        edge_sources = graph.edge_sources() if mode == "edge_list" else None
+        counters = self._counters()
+
+        sources = range(self.num_nodes) if sources is None else sources
+        routing_table, first_hop_table, predecessor_table = self._empty_tables(with_paths, compact)
+        for done, src in enumerate(sources, 1):
+            distances = unreached[:]
+            first_hops = parents = None
+            if with_paths:
+                first_hops = unset[:]
+                parents = unset[:]
+
+            if mode == "spfa":
+                spfa_csr(graph.offsets, graph.targets, graph.weights, src, distances, queue, in_queue, first_hops, parents,
+                         counters)
+            else:
+                bellman_ford_edges(edge_sources, graph.targets, graph.weights, src, distances, first_hops, parents,
+                                   counters)
+            routing_table[src] = distances
+            if with_paths:
+                first_hop_table[src] = first_hops
+                predecessor_table[src] = parents
+            if progress:
+                progress(done, len(sources))
+
+        if with_paths:
+            return routing_table, first_hop_table, predecessor_table
+        return routing_table
+
+
+    def all_pairs_floyd_warshall(self, with_paths=False, progress=None, compact=False):
+        # Compute all shortest distances at once with the vectorized Floyd-Warshall engine,
+        # returned in the same layout as all_pairs_dijkstra. progress counts pivots instead of sources
+        result = floyd_warshall_numpy(self._current_csr(), self.adjacency_array, with_paths=with_paths,
+                                      progress=progress)
+        dist = result[0] if with_paths else result
+        unreachable = dist >= numpy_unreachable(dist.dtype)
+
+        if compact:
+            # The matrices convert straight into the packed tables
+            routing_table, first_hop_table, predecessor_table = self._empty_tables(with_paths, compact)
+            routing_table.assign_numpy(dist, unreachable)
+            if not with_paths:
+                return routing_table
+            first_hop_table.assign_numpy(result[1], result[1] < 0)
+            predecessor_table.assign_numpy(result[2], result[2] < 0)
+            return routing_table, first_hop_table, predecessor_table
+
+        routing_table = {}
+        for src, row in enumerate(dist.tolist()):
+            if unreachable[src].any():
+                row = [float('inf') if missing else value for value, missing in zip(row, unreachable[src].tolist())]
+            routing_table[src] = row
+        if not with_paths:
+            return routing_table
+
+        # -1 marks "no entry" in the NumPy matrices, the tables use None like the other engines
+        first_hop_table = {src: [None if hop < 0 else hop for hop in row] for src, row in enumerate(result[1].tolist())}
+        predecessor_table = {src: [None if parent < 0 else parent for parent in row]
+                             for src, row in enumerate(result[2].tolist())}
+        return routing_table, first_hop_table, predecessor_table
+
+    def all_pairs_parallel(self, algorithm, with_paths=False, workers=None, progress=None, compact=False):
+        # Spread the per-source shortest-path runs of the given algorithm over a pool of worker processes.
+        # The CSR arrays go to the workers through one shared memory segment and every worker writes its rows straight
+        # into a second, shared table segment, so neither the topology nor the results are pickled per task.
+        # progress is called as chunks of sources complete, if it raises the chunks not yet started are dropped
+        graph = self._current_csr()
+        num_nodes = self.num_nodes
+        num_links = len(graph.targets)
+        workers = workers or os.cpu_count() or 1
+
+        graph_memory = SharedMemory(create=True, size=4 * (num_nodes + 1 + 2 * num_links))
+        tables_memory = SharedMemory(create=True, size=(16 if with_paths else 8) * num_nodes * num_nodes or 1)
+        links = tables = None
+        try:
+            links = graph_memory.buf.cast('i')
+            links[:num_nodes + 1] = graph.offsets
+            links[num_nodes + 1:num_nodes + 1 + num_links] = graph.targets
+            links[num_nodes + 1 + num_links:] = graph.weights
+
+            # A few chunks per worker keep the pool balanced when some sources take longer than others
+            chunk = max(1, -(-num_nodes // (workers * 4)))
+            starts = list(range(0, num_nodes, chunk))
+            stops = [min(start + chunk, num_nodes) for start in starts]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_routing_worker,
+                                     initargs=(graph_memory.name, tables_memory.name, num_nodes, num_links,
+                                               algorithm, with_paths)) as pool:
+                futures = {pool.submit(_routing_worker_chunk, start, stop): stop - start
+                           for start, stop in zip(starts, stops)}
+                try:
+                    done = 0
+                    for future in as_completed(futures):
+                        counters = future.result()
+                        if self.profiler:
+                            for name, value in counters.items():
+                                self.profiler.count(name, value)
+                        done += futures[future]
+                        if progress:
+                            progress(done, num_nodes)
+                except BaseException:
+                    pool.shutdown(cancel_futures=True)
+                    raise
+
+            # Assemble the tables from the shared rows, turning the -1 markers back into infinity and None
+            tables = _shared_table_views(tables_memory.buf, num_nodes, with_paths)
+            routing_table, first_hop_table, predecessor_table = self._empty_tables(with_paths, compact)
+            if compact and np is not None:
+                # Whole-matrix conversion, the NumPy views must be gone before the shared views are released
+                for table, view, dtype in zip((routing_table, first_hop_table, predecessor_table), tables,
+                                              (np.int64, np.int32, np.int32)):
+                    matrix = np.frombuffer(view, dtype=dtype).reshape(num_nodes, num_nodes)
+                    table.assign_numpy(matrix, matrix < 0)
+                    del matrix
+            else:
+                for src in range(num_nodes):
+                    row = slice(src * num_nodes, (src + 1) * num_nodes)
+                    routing_table[src] = [float('inf') if dist < 0 else dist for dist in tables[0][row].tolist()]
+                    if with_paths:
+                        first_hop_table[src] = [None if hop < 0 else hop for hop in tables[1][row].tolist()]
+                        predecessor_table[src] = [None if parent < 0 else parent for parent in tables[2][row].tolist()]
+        finally:
+            # Every view has to be released before the segments can be closed
+            for view in (tables or []) + [links]:
+                if view is not None:
+                    view.release()
+            graph_memory.close()
+            graph_memory.unlink()
+            tables_memory.close()
+            tables_memory.unlink()
+
+        if with_paths:
+            return routing_table, first_hop_table, predecessor_table
+        return routing_table
+
+    def choose_engine(self):
+        # Pick the vectorized engine for dense topologies big enough to amortize it and small enough to fit in memory
+        if np is not None and NUMPY_MIN_NODES <= self.num_nodes <= NUMPY_MAX_NODES:
+            density = 2 * self.graph.num_edges / (self.num_nodes * (self.num_nodes - 1))
+            if density >= NUMPY_MIN_DENSITY:
+                return "numpy"
+
+        # Large sparse topologies are spread over worker processes when there is more than one core
+        if self.num_nodes >= PARALLEL_MIN_NODES and (os.cpu_count() or 1) > 1:
+            return "parallel"
+        return "python"
+
+    def calculate_routing_table(self, algorithm, with_paths=False, engine="auto", workers=None, progress=None,
+                                ecmp=False, compact=True):
+        # Calculate routing tables based on the selected algorithm.
+        # With with_paths the forwarding and predecessor tables are filled from the same shortest-path runs.
+        # engine="numpy" computes them with the vectorized Floyd-Warshall instead, giving identical tables,
+        # "parallel" runs the selected algorithm on a pool of worker processes (os.cpu_count() unless workers is given)
+        # and "auto" picks one from the size and density of the topology.
+        # progress(done, total) is called as the computation advances; if it raises, the exception propagates and the
+        # previous tables are kept, since the new ones only replace them once complete.
+        # ecmp also fills multipath_table with every equal-cost next hop: inside the Dijkstra runs of the python Link
+        # State engine, and from the finished distances (one pass over the links per source) for the other engines.
+        # The tables are compact ArrayTables (uint16/uint32 distances, int32 hops and predecessors) read like the
+        # dict-of-rows tables, compact=False keeps them as Python dicts of lists instead
+        if engine not in ROUTING_ENGINES:
+            raise ValueError(f"Unknown routing engine: {engine}")
+        if engine == "auto":
+            engine = self.choose_engine()
+        elif engine == "numpy" and np is None:
+            raise RuntimeError("The numpy routing engine needs NumPy installed")
+
+        version = self.version
+        routing_table = {}
+        first_hop_table = {}
+        predecessor_table = {}
+        multipath = MultipathTable(self.num_nodes) if ecmp else None
+
+        # Shortest-path runs and the forwarding entries derived from them are timed as separate phases
+        with self.phase("routing_table"):
+            if engine == "numpy" and algorithm in ("Link State Routing", "Distance Vector Routing"):
+                # Both algorithms produce the same tables, so one vectorized run serves either of them
+                if with_paths:
+                    routing_table, first_hop_table, predecessor_table = self.all_pairs_floyd_warshall(
+                        with_paths=True, progress=progress, compact=compact)
+                else:
+                    routing_table = self.all_pairs_floyd_warshall(progress=progress, compact=compact)
+
+            elif engine == "parallel" and algorithm in ("Link State Routing", "Distance Vector Routing"):
+                if with_paths:
+                    routing_table, first_hop_table, predecessor_table = self.all_pairs_parallel(
+                        algorithm, with_paths=True, workers=workers, progress=progress, compact=compact)
+                else:
+                    routing_table = self.all_pairs_parallel(algorithm, workers=workers, progress=progress,
+                                                            compact=compact)
+
+            # If the algorithm chosen is "Link State Routing"
+            elif algorithm == "Link State Routing":
+                # Calculate routing table for each node using Dijkstra's algorithm
+                if with_paths or ecmp:
+                    routing_table, first_hop_table, predecessor_table = self.all_pairs_dijkstra(
+                        with_paths=True, progress=progress, multipath=multipath, compact=compact)
+                else:
+                    routing_table = self.all_pairs_dijkstra(progress=progress, compact=compact)
+
+            # If the algorithm chosen is "Distance Vector Routing"
+            elif algorithm == "Distance Vector Routing":
+                # Calculate routing table for each node using the queue-driven Bellman-Ford algorithm
+                if with_paths:
+                    routing_table, first_hop_table, predecessor_table = self.all_pairs_bellman_ford(
+                        with_paths=True, progress=progress, compact=compact)
+                else:
+                    routing_table = self.all_pairs_bellman_ford(progress=progress, compact=compact)
+
+        if ecmp and not multipath:
+            with self.phase("ecmp_table"):
+                multipath = self._multipath_from_distances(routing_table)
+
+        # Replace the existing tables with the new ones
+        self.multipath_table = multipath
+        self._multipath_version = version if ecmp else None
+        self.algorithm = algorithm
+        self.engine = engine
+        self.tables_version = version
+        self.routing_table = routing_table
+        self.predecessor_table = predecessor_table
+
+        # The forwarding entry towards every other node is the first hop recorded during relaxation.
+        # Compact first hops are used in place, as {dest: next_hop} rows over the same array
+        self.forwarding_table = {}
+        with self.phase("forwarding_table"):
+            if isinstance(first_hop_table, ArrayTable):
+                self.forwarding_table = ArrayTable(first_hop_table.data, self.num_nodes, None, forwarding=True)
+            else:
+                for src, first_hops in first_hop_table.items():
+                    self.forwarding_table[src] = {dest: first_hops[dest] for dest in range(self.num_nodes)
+                                                  if dest != src}
+
+
+    def generate_forwarding_table(self, algorithm, engine="auto", workers=None, progress=None, ecmp=False,
+                                  compact=True):
+        # Compute the routing table based on the selected algorithm, collecting the first hops on the way
+        self.calculate_routing_table(algorithm, with_paths=True, engine=engine, workers=workers, progress=progress,
+                                     ecmp=ecmp, compact=compact)
+
+
+    def tables_current(self, algorithm=None):
+        # Whether the routing tables were computed on the current links (and with the given algorithm)
+        return (bool(self.routing_table) and self.tables_version == self.version
+                and (algorithm is None or algorithm == self.algorithm))
+
+    def _current_csr(self):
+        # CSR snapshot of the links, taken once per version (the CSR backend is its own snapshot)
+        if self._csr_version != self.version:
+            self._csr = self.graph.to_csr()
+            self._csr_version = self.version
+        return self._csr
+
+    def _cached_route(self, key):
+        # Look a tree or path up in the LRU cache, dropping everything cached for an older version of the links
+        if self._route_cache_version != self.version:
+            self._route_cache.clear()
+            self._route_cache_version = self.version
+        entry = self._route_cache.get(key)
+        if entry is not None:
+            self._route_cache.move_to_end(key)
+            self.route_cache_stats["hits"] += 1
+        return entry
+
+    def _cache_route(self, key, entry):
+        self.route_cache_stats["misses"] += 1
+        self._route_cache[key] = entry
+        while len(self._route_cache) > self.route_cache_size:
+            self._route_cache.popitem(last=False)
+
+    def shortest_path_tree(self, src):
+        # Distances, first hops and predecessors from one source, computed on first use and kept in the LRU cache
+        tree = self._cached_route(src)
+        if tree is None:
+            graph = self._current_csr()
+            distances = [float('inf')] * self.num_nodes
+            first_hops = [None] * self.num_nodes
+            parents = [None] * self.num_nodes
+            dijkstra_csr(graph.offsets, graph.targets, graph.weights, src, distances, [], first_hops, parents,
+                         self._counters())
+            tree = (distances, first_hops, parents)
+            self._cache_route(src, tree)
+        return tree
+
+    def route(self, src, dst):
+        # Cost and node list of the route from src to dst without computing all-pairs tables.
+        # Up-to-date tables or a cached tree of src answer directly, otherwise a bidirectional search computes just this
+        # pair. A point query may settle equal-cost ties differently from the forwarding tables
+        if src == dst:
+            return 0, [src]
+
+        if self.forwarding_table and self.tables_current():
+            cost = self.routing_table[src][dst]
+            if cost == float('inf'):
+                return cost, []
+            path = [src]
+            while path[-1] != dst:
+                path.append(self.forwarding_table[path[-1]][dst])
+            return cost, path
+
+        tree = self._cached_route(src)
+        if tree is not None:
+            distances, _, parents = tree
+            if distances[dst] == float('inf'):
+                return distances[dst], []
+            path = [dst]
+            while path[-1] != src:
+                path.append(parents[path[-1]])
+            path.reverse()
+            return distances[dst], path
+
+        entry = self._cached_route((src, dst))
+        if entry is None:
+            graph = self._current_csr()
+            cost, path = bidirectional_dijkstra_csr(graph.offsets, graph.targets, graph.weights, src, dst)
+            entry = (cost, tuple(path))
+            self._cache_route((src, dst), entry)
+        return entry[0], list(entry[1])
+
+
+    def set_link_cost(self, u, v, weight):
+        # Change the cost of an existing link and repair the tables, returning the number of repaired sources
+        if not self.graph.weight(u, v):
+            raise ValueError(f"There is no link between {u} and {v}")
+        if weight <= 0:
+            raise ValueError(f"Link cost must be positive, got {weight}")
+        with self.phase("repair_tables"):
+            return self._change_link(u, v, weight)
+
+    def add_link(self, u, v, weight):
+        # Connect two nodes that were not linked yet and repair the tables
+        if u == v or self.graph.weight(u, v):
+            raise ValueError(f"Cannot add a link between {u} and {v}")
+        if weight <= 0:
+            raise ValueError(f"Link cost must be positive, got {weight}")
+        with self.phase("repair_tables"):
+            return self._change_link(u, v, weight)
+
+    def remove_link(self, u, v):
+        # Take a link down and repair the tables
+        if not self.graph.weight(u, v):
+            raise ValueError(f"There is no link between {u} and {v}")
+        with self.phase("repair_tables"):
+            return self._change_link(u, v, 0)
+
+    def fail_node(self, node):
+        # Take every link of a node down at once, the node stays in the tables but becomes unreachable
+        with self.phase("repair_tables"):
+            return self._fail_node(node)
+
+    def _fail_node(self, node):
+        neighbors = [neighbor for neighbor, _ in self.graph.neighbors(node)]
+        current = self.tables_current()
+        for neighbor in neighbors:
+            self._set_link(node, neighbor, 0)
+        if not current:
+            return 0
+        if not self.predecessor_table:
+            self.calculate_routing_table(self.algorithm, with_paths=True, engine=self.engine,
+                                         compact=isinstance(self.routing_table, ArrayTable))
+            return self.num_nodes
+        self._reserve_distances()
+
+        repaired = 0
+        for src, distances in self.routing_table.items():
+            first_hops = self.forwarding_table[src]
+            parents = self.predecessor_table[src]
+            if src == node:
+                # The failed node itself can no longer reach anyone
+                for dest in range(self.num_nodes):
+                    if dest != src:
+                        distances[dest] = float('inf')
+                        first_hops[dest] = None
+                        parents[dest] = None
+                repaired += 1
+            elif distances[node] != float('inf'):
+                # Everything routed through the node has to find another way
+                lowered = self._lower_direct_links(src, [node])
+                self._choose_parents(src, self._repair_subtrees(src, [node]))
+                self._take_direct_links(src, lowered)
+                repaired += 1
+        self.tables_version = self.version
+        return repaired
+
+    def _reserve_distances(self):
+        # Make room in a compact distance table for the longest shortest path the current link costs allow, before a
+        # repair writes into its rows
+        if isinstance(self.routing_table, ArrayTable):
+            self.routing_table.reserve(max(self._current_csr().weights, default=1) * max(self.num_nodes - 1, 1))
+
+    def _set_link(self, u, v, weight):
+        # Write a link change into the storage backend and the dense view if it was built, weight 0 removes the link
+        if weight:
+            self.graph.set_edge(u, v, weight)
+        else:
+            self.graph.remove_edge(u, v)
+        if self._adjacency_matrix is not None:
+            self._adjacency_matrix[u][v] = weight
+            self._adjacency_matrix[v][u] = weight
+        if self._adjacency_array is not None:
+            self._adjacency_array[u, v] = weight
+            self._adjacency_array[v, u] = weight
+        self.version += 1
+
+    def _change_link(self, u, v, weight):
+        # Dynamic SPF: only the shortest-path trees that use the link, or that the link can improve, are touched
+        old_weight = self.graph.weight(u, v)
+        current = self.tables_current()
+        self._set_link(u, v, weight)
+
+        # Nothing (up to date) computed yet, or tables without predecessors that cannot be repaired in place
+        if not current:
+            return 0
+        if not self.predecessor_table:
+            self.calculate_routing_table(self.algorithm, with_paths=True, engine=self.engine,
+                                         compact=isinstance(self.routing_table, ArrayTable))
+            return self.num_nodes
+        self._reserve_distances()
+
+        repaired = 0
+        for src, distances in self.routing_table.items():
+            parents = self.predecessor_table[src]
+            worse = old_weight and (not weight or weight > old_weight)
+            if worse and src not in (u, v) and parents[v] != u and parents[u] != v:
+                # A link got worse or went down: only the subtree hanging below it in the tree can change, and the
+                # direct links of the source when it is one of the ends
+                continue
+
+            lowered = self._lower_direct_links(src, [u, v])
+            if not worse:
+                changed = self._repair_improvement(src, u, v, weight)
+            elif parents[v] == u:
+                changed = self._repair_subtrees(src, [v])
+            elif parents[u] == v:
+                changed = self._repair_subtrees(src, [u])
+            else:
+                changed = []
+            # The link itself may add or drop an equal-cost predecessor of its endpoints without changing any route
+            moved = self._choose_parents(src, changed + [u, v])
+            moved = self._take_direct_links(src, lowered) or moved
+            if not (changed or moved):
+                continue
+            repaired += 1
+        self.tables_version = self.version
+        return repaired
+
+    def _repair_subtrees(self, src, roots):
+        # Recompute the shortest-path subtrees below the given roots of the tree of src.
+        # Their nodes are reset and re-entered from the unaffected boundary with a Dijkstra restricted to them.
+        # Returns the nodes whose entries were rewritten
+        distances = self.routing_table[src]
+        first_hops = self.forwarding_table[src]
+        parents = self.predecessor_table[src]
+
+        # Collect the subtree nodes through the child lists of the predecessor tree
+        children = [[] for _ in range(self.num_nodes)]
+        for node, parent in enumerate(parents):
+            if parent is not None:
+                children[parent].append(node)
+        affected = bytearray(self.num_nodes)
+        stack = list(roots)
+        subtree = []
+        while stack:
+            node = stack.pop()
+            if not affected[node]:
+                affected[node] = 1
+                subtree.append(node)
+                stack.extend(children[node])
+
+        for node in subtree:
+            distances[node] = float('inf')
+            first_hops[node] = None
+            parents[node] = None
+
+        # Seed each affected node with its best route over a link from the unaffected, still final, part of the tree
+        heap = []
+        for node in subtree:
+            for neighbor, weight in self.graph.neighbors(node):
+                if affected[neighbor] or distances[neighbor] == float('inf'):
+                    continue
+                new_dist = distances[neighbor] + weight
+                hop = node if neighbor == src else first_hops[neighbor]
+                if new_dist < distances[node] or (new_dist == distances[node] and hop < first_hops[node]):
+                    distances[node] = new_dist
+                    first_hops[node] = hop
+                    parents[node] = neighbor
+            if distances[node] != float('inf'):
+                heappush(heap, (distances[node], node))
+
+        # Settle the affected nodes in distance order, relaxing only links that stay inside the affected set
+        while heap:
+            dist, node = heappop(heap)
+            if dist > distances[node]:
+                continue
+            for neighbor, weight in self.graph.neighbors(node):
+                if not affected[neighbor]:
+                    continue
+                new_dist = dist + weight
+                if new_dist < distances[neighbor]:
+                    distances[neighbor] = new_dist
+                    first_hops[neighbor] = first_hops[node]
+                    parents[neighbor] = node
+                    heappush(heap, (new_dist, neighbor))
+                elif new_dist == distances[neighbor] and first_hops[node] < first_hops[neighbor]:
+                    first_hops[neighbor] = first_hops[node]
+                    parents[neighbor] = node
+
+        # Where the repaired subtree now starts with a different first hop, equal-cost routes of the nodes around it
+        # may prefer that hop, so let the repaired nodes offer their routes to the rest of the tree
+        return subtree + self._propagate_improvements(src, [(distances[node], node) for node in subtree
+                                                            if distances[node] != float('inf')])
+
+    def _repair_improvement(self, src, u, v, weight):
+        # A link got cheaper or came up: push the improvement outwards from its endpoints, returning the changed nodes
+        distances = self.routing_table[src]
+        seeds = [(distances[node], node) for node in (u, v) if distances[node] != float('inf')]
+        return self._propagate_improvements(src, seeds)
+
+    def _propagate_improvements(self, src, heap):
+        # Relax outwards from the nodes on the heap, taking every shorter route or equally short one with a preferred
+        # first hop. Unlike a full run, settled nodes can be improved again, so equal-cost hop changes are re-queued too.
+        # Returns the nodes whose entries changed
+        distances = self.routing_table[src]
+        first_hops = self.forwarding_table[src]
+        parents = self.predecessor_table[src]
+        changed = []
+        heap.sort()
+
+        while heap:
+            dist, node = heappop(heap)
+            if dist > distances[node]:
+                continue
+            for neighbor, weight in self.graph.neighbors(node):
+                if neighbor == src:
+                    continue
+                new_dist = dist + weight
+                hop = neighbor if node == src else first_hops[node]
+                if new_dist < distances[neighbor] or (new_dist == distances[neighbor] and hop < first_hops[neighbor]):
+                    distances[neighbor] = new_dist
+                    first_hops[neighbor] = hop
+                    parents[neighbor] = node
+                elif new_dist == distances[neighbor] and parents[neighbor] == node and hop != first_hops[neighbor]:
+                    # The parent moved to a first hop the neighbor does not prefer, so choose again among all equal-cost
+                    # predecessors to keep every first hop equal to the one of its parent
+                    best_hop = best_parent = None
+                    for pred, link_weight in self.graph.neighbors(neighbor):
+                        if distances[pred] + link_weight != new_dist:
+                            continue
+                        candidate = neighbor if pred == src else first_hops[pred]
+                        if best_hop is None or candidate < best_hop:
+                            best_hop, best_parent = candidate, pred
+                    parents[neighbor] = best_parent
+                    if best_hop == first_hops[neighbor]:
+                        continue
+                    first_hops[neighbor] = best_hop
+                else:
+                    continue
+                changed.append(neighbor)
+                heappush(heap, (new_dist, neighbor))
+
+        return changed
+
+    def _lower_direct_links(self, src, nodes):
+        # Repairs relax with the lowest first hop of every node like the kernels do, so take the direct links of src,
+        # and those of the given nodes that were direct before the change, back to that hop (see take_direct_links).
+        # Closest first, so every predecessor already holds its own lowest hop. Returns {node: first hop} as it was
+        distances = self.routing_table[src]
+        first_hops = self.forwarding_table[src]
+        parents = self.predecessor_table[src]
+        candidates = {neighbor for neighbor, _ in self.graph.neighbors(src)}.union(nodes)
+        candidates.discard(src)
+        lowered = {}
+        for node in sorted(candidates, key=distances.__getitem__):
+            lowered[node] = hop = first_hops[node]
+            parent = parents[node]
+            if hop == node and parent is not None and parent != src:
+                first_hops[node] = first_hops[parent]
+        return lowered
+
+    def _take_direct_links(self, src, lowered):
+        # Switch the destinations whose direct link is a shortest route back to it after a repair, returning whether
+        # any of the lowered nodes ends up with another first hop than before
+        first_hops = self.forwarding_table[src]
+        take_direct_links(self.graph.neighbors(src), self.routing_table[src], first_hops)
+        return any(first_hops[node] != hop for node, hop in lowered.items())
+
+    def _choose_parents(self, src, nodes):
+        # Give the changed nodes, and the neighbors that may have gained or lost them as equal-cost predecessors, the
+        # predecessor a full Dijkstra run records: of the neighbors on a shortest route through the chosen first hop,
+        # the one settled first, so the closest and then the lowest numbered. Returns whether any predecessor moved
+        distances = self.routing_table[src]
+        first_hops = self.forwarding_table[src]
+        parents = self.predecessor_table[src]
+        seen = bytearray(self.num_nodes)
+        around = []
+        for node in nodes:
+            for neighbor in [node] + [neighbor for neighbor, _ in self.graph.neighbors(node)]:
+                if not seen[neighbor]:
+                    seen[neighbor] = 1
+                    around.append(neighbor)
+
+        moved = False
+        for node in around:
+            if node == src or distances[node] == float('inf'):
+                continue
+            best = None
+            for pred, weight in self.graph.neighbors(node):
+                if distances[pred] + weight != distances[node]:
+                    continue
+                hop = node if pred == src else first_hops[pred]
+                if hop == first_hops[node] and (best is None or (distances[pred], pred) < (distances[best], best)):
+                    best = pred
+            if parents[node] != best:
+                parents[node] = best
+                moved = True
+        return moved
+
+
+    def _sink_trees(self):
+        # Next hops of every node towards every destination, row d holding the sink tree of d: a NumPy int32 matrix with
+        # -1 for no hop when NumPy is available, nested lists with None otherwise. Kept until the tables change
+        if not self.forwarding_table or not self.tables_current():
+            raise ValueError("Route analytics need up-to-date forwarding tables, generate them first")
+        cache = self._sink_tree_cache
+        if cache is not None and cache[0] == self.tables_version and cache[1] is self.forwarding_table:
+            return cache[2]
+
+        num_nodes = self.num_nodes
+        if np is not None and isinstance(self.forwarding_table, ArrayTable):
+            # The compact table is the transposed matrix already, -1 marking missing hops
+            toward = np.array(self.forwarding_table.to_numpy().T, dtype=np.int32)
+            np.fill_diagonal(toward, -1)
+        elif np is not None:
+            toward = np.full((num_nodes, num_nodes), -1, dtype=np.int32)
+            for node in range(num_nodes):
+                row = self.forwarding_table[node]
+                dests = [dest for dest, hop in row.items() if hop is not None]
+                toward[dests, node] = [row[dest] for dest in dests]
+        else:
+            toward = [[None] * num_nodes for _ in range(num_nodes)]
+            for node in range(num_nodes):
+                for dest, hop in self.forwarding_table[node].items():
+                    toward[dest][node] = hop
+
+        self._sink_tree_cache = (self.tables_version, self.forwarding_table, toward)
+        return toward
+
+    def _route_hops(self):
+        # Sink trees and the hop counts over them, both indexed [destination][node]
+        toward = self._sink_trees()
+        if np is not None:
+            return toward, sink_tree_hops_numpy(toward)
+        return toward, [sink_tree_hops(row, dest) for dest, row in enumerate(toward)]
+
+    def hop_count_table(self):
+        # Hop counts of the forwarded route between every pair as {src: row}, 0 to itself and None when unreachable
+        _, hops = self._route_hops()
+        if np is not None:
+            return {src: [None if count < 0 else count for count in row] for src, row in enumerate(hops.T.tolist())}
+        return {src: list(row) for src, row in enumerate(zip(*hops))}
+
+    def paths(self, pairs):
+        # Forwarded routes of a batch of (src, dst) pairs as node lists, [] when unreachable. With NumPy all routes
+        # advance one hop per step together, so the batch takes as many steps as its longest route
+        pairs = list(pairs)
+        toward = self._sink_trees()
+        if np is None or not pairs:
+            paths = []
+            for src, dst in pairs:
+                path = [src]
+                while path[-1] != dst and path[-1] is not None:
+                    path.append(toward[dst][path[-1]])
+                paths.append(path if path[-1] is not None else [])
+            return paths
+
+        sources, dests = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+        current = sources.copy()
+        reachable = (current == dests) | (toward[dests, current] >= 0)
+        active = reachable & (current != dests)
+        steps = [current]
+        while active.any():
+            current = np.where(active, toward[dests, np.where(active, current, 0)], current)
+            steps.append(current)
+            active &= current != dests
+            if len(steps) > self.num_nodes:
+                raise ValueError("The forwarding tables loop")
+
+        walks = np.stack(steps, axis=1)
+        lengths = (walks == dests[:, None]).argmax(axis=1) + 1
+        return [walk[:length] if ok else [] for walk, length, ok in zip(walks.tolist(), lengths.tolist(), reachable)]
 
-    def generate_topology(self):
-        # Randomly connect nodes to form a network using a nested loop
-        for i in range(self.num_nodes):
-            for j in range(i + 1, self.num_nodes):
-                # Randomly determine if there should be a connection based on probability (50% chance)
-                if random.random() > 0.7:  # Adjust probability for connection
-                    # Assign a random weight/cost to the connection (range: 1 to 10)
-                    weight = random.randint(1, 10)
-                    
-                    # Update the adjacency matrix to represent the connection between nodes
-                    self.adjacency_matrix[i][j] = weight
-                    self.adjacency_matrix[j][i] = weight  # Since it's an undirected graph
-
-        # Check connectivity after generating the connections
-        if not self.is_connected():
-            # Retry generating topology until it's connected
-            self.generate_topology()
+    def link_loads(self):
+        # Edge betweenness along the forwarded routes: {(u, v): number of (src, dst) routes crossing the link}, u < v
+        toward, hops = self._route_hops()
+        # Sorted, since the NumPy kernel looks the keys up by binary search and not every backend yields sorted links
+        edges = sorted((u, v) for u, v, _ in self.graph.edges())
+        if np is not None:
+            keys = np.array([u * self.num_nodes + v for u, v in edges], dtype=np.int64)
+            return dict(zip(edges, sink_tree_loads_numpy(toward, hops, keys).tolist()))
 
+        loads = dict.fromkeys(edges, 0)
+        for row, counts in zip(toward, hops):
+            sink_tree_loads(row, counts, loads)
+        return loads
 
-    def is_connected(self):
-        # Start BFS from node 0 and check if all nodes are reachable
+    def min_hop_table(self):
+        # Fewest hops between every pair regardless of cost, one BFS per source: {src: row}, None when unreachable
+        graph = self._current_csr()
+        table = {}
+        for src in range(self.num_nodes):
+            hops = [None] * self.num_nodes
+            hops[src] = 0
+            frontier = [src]
+            while frontier:
+                following = []
+                for node in frontier:
+                    for neighbor in graph.targets[graph.offsets[node]:graph.offsets[node + 1]]:
+                        if hops[neighbor] is None:
+                            hops[neighbor] = hops[node] + 1
+                            following.append(neighbor)
+                frontier = following
+            table[src] = hops
+        return table
 
-        # Create a list to track visited nodes
-        visited = [False] * self.num_nodes
+    def path_statistics(self, with_stretch=False, busiest=5):
+        # Distribution of the forwarded routes over all ordered pairs: cost and hop diameter and averages, the hop count
+        # histogram and the link loads. with_stretch adds how many more hops the routes take than the fewest possible
+        # (one BFS per source, O(V * E))
+        loads = self.link_loads()
+        min_hops = self.min_hop_table() if with_stretch else None
 
-        # Initialize a queue for BFS starting from node 0
-        queue = deque([0])
-        visited[0] = True  # Mark the starting node as visited
+        if np is not None:
+            # Whole-matrix reductions, source-major like the tables
+            hops = self._route_hops()[1].T
+            costs = self._distance_matrix(self.routing_table)
+            reached = hops > 0
+            pairs = int(reached.sum())
+            route_hops, route_costs = hops[reached], costs[reached]
+            cost_sum, hop_sum = route_costs.sum().item(), int(route_hops.sum())
+            diameter = route_costs.max().item() if pairs else 0
+            hop_diameter = int(route_hops.max()) if pairs else 0
+            histogram = {count: int(pairs_with) for count, pairs_with in enumerate(np.bincount(route_hops)) if pairs_with}
+            if with_stretch:
+                fewest = np.array([[0 if count is None else count for count in min_hops[src]]
+                                   for src in range(self.num_nodes)])[reached]
+                stretches = route_hops / fewest
+                stretch_sum, stretch_max = stretches.sum().item(), stretches.max(initial=1.0).item()
+            if diameter == int(diameter):
+                diameter = int(diameter)
+        else:
+            pairs = cost_sum = hop_sum = 0
+            diameter = hop_diameter = 0
+            histogram = {}
+            stretch_sum, stretch_max = 0.0, 1.0
+            for src, hops in self.hop_count_table().items():
+                costs = self.routing_table[src]
+                for dest, count in enumerate(hops):
+                    if not count:
+                        continue
+                    pairs += 1
+                    cost_sum += costs[dest]
+                    hop_sum += count
+                    diameter = max(diameter, costs[dest])
+                    hop_diameter = max(hop_diameter, count)
+                    histogram[count] = histogram.get(count, 0) + 1
+                    if with_stretch:
+                        stretch = count / min_hops[src][dest]
+                        stretch_sum += stretch
+                        stretch_max = max(stretch_max, stretch)
 
-        while queue:
-            # Dequeue a node from the front of the queue
-            node = queue.popleft()
+        load_values = list(loads.values())
+        summary = {
+            "pairs": pairs,
+            "unreachable_pairs": self.num_nodes * (self.num_nodes - 1) - pairs,
+            "diameter": diameter,
+            "hop_diameter": hop_diameter,
+            "average_cost": cost_sum / pairs if pairs else None,
+            "average_hops": hop_sum / pairs if pairs else None,
+            "hop_histogram": dict(sorted(histogram.items())),
+            "average_link_load": sum(load_values) / len(load_values) if load_values else 0,
+            "max_link_load": max(load_values, default=0),
+            "busiest_links": sorted(loads.items(), key=lambda item: -item[1])[:busiest],
+        }
+        if with_stretch:
+            summary["average_hop_stretch"] = stretch_sum / pairs if pairs else None
+            summary["max_hop_stretch"] = stretch_max
+        return summary
 
-            # Iterate through all adjacent nodes
-            for adjacent, weight in enumerate(self.adjacency_matrix[node]):
-                # Check if the node is connected and not visited
-                if weight > 0 and not visited[adjacent]:
-                    visited[adjacent] = True  # Mark the node as visited
-                    queue.append(adjacent)  # Enqueue the adjacent node
+    def _distance_matrix(self, routing_table):
+        # Float64 NumPy matrix of a distance table with infinity for unreachable pairs, straight from the array of a
+        # compact table
+        if isinstance(routing_table, ArrayTable):
+            matrix = routing_table.to_numpy()
+            return np.where(matrix == routing_table.sentinel, np.inf, matrix.astype(np.float64))
+        return np.array([list(routing_table[src]) for src in range(self.num_nodes)], dtype=np.float64)
 
-        # Check if all nodes have been visited
-        return all(visited)
+    def _multipath_from_distances(self, routing_table):
+        # MultipathTable rebuilt from a distance table over the current links
+        graph = self._current_csr()
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        multipath = MultipathTable(self.num_nodes)
+        matrix = None
+        if np is not None and self.num_nodes <= NUMPY_MAX_NODES:
+            matrix = self._distance_matrix(routing_table)
+        elif isinstance(routing_table, ArrayTable):
+            # Plain lists for the per-entry comparisons
+            routing_table = {src: routing_table[src].tolist() for src in range(self.num_nodes)}
+        for src in range(self.num_nodes):
+            start, end = offsets[src], offsets[src + 1]
+            width = mask_width(end - start)
+            if matrix is not None:
+                packed = ecmp_masks_numpy(offsets, targets, weights, src, matrix, width)
+            else:
+                packed = ecmp_masks_python(offsets, targets, weights, src, routing_table, width)
+            multipath.set_row(src, targets[start:end], packed)
+        return multipath
 
-    def dijkstra(self, src):
-        # Initialize distances dictionary with all nodes having infinite distance
-        distances = {node: float('inf') for node in range(self.num_nodes)}
-        distances[src] = 0  # Set the distance of the source node to 0
-        visited = [False] * self.num_nodes  # Track visited nodes
-
-        # Iterate through the nodes to find shortest paths
-        for _ in range(self.num_nodes):
-            min_dist = float('inf')  # Initialize minimum distance to infinity
-            min_idx = -1  # Initialize index for the minimum distance node
-
-            # Find the node with the minimum distance that has not been visited yet
-            for i in range(self.num_nodes):
-                if not visited[i] and distances[i] < min_dist:
-                    min_dist = distances[i]
-                    min_idx = i
-
-            visited[min_idx] = True  # Mark the minimum distance node as visited
-
-            # Update distances for neighboring nodes of the current node
-            for j in range(self.num_nodes):
-                # Check unvisited nodes connected to the current node
-                if (not visited[j]) and (self.adjacency_matrix[min_idx][j] > 0):
-                    # Calculate the new distance through the current node
-                    new_dist = distances[min_idx] + self.adjacency_matrix[min_idx][j]
-                    
-                    # Update distance if the new distance is shorter than the recorded distance
-                    if new_dist < distances[j]:
-                        distances[j] = new_dist  # Update distance for the node
-
-        return distances  # Return the computed shortest distances from the source node
+    def ecmp_table(self):
+        # Equal-cost next hops of the current tables as a MultipathTable, rebuilt from the distances when they were
+        # computed without ecmp or have been repaired since
+        if not self.tables_current():
+            raise ValueError("ECMP needs up-to-date routing tables, generate them first")
+        if self.multipath_table is None or self._multipath_version != self.version:
+            with self.phase("ecmp_table"):
+                self.multipath_table = self._multipath_from_distances(self.routing_table)
+            self._multipath_version = self.version
+        return self.multipath_table
 
-    
-    def bellman_ford(self, src):
-        # Initialize distances dictionary with all nodes having infinite distance
-        distances = {node: float('inf') for node in range(self.num_nodes)}
-        distances[src] = 0  # Set the distance of the source node to 0
-
-        # Iterate through the nodes multiple times to relax edges and find shortest paths
-        for _ in range(self.num_nodes - 1):
-            # Iterate through all nodes
-            for u in range(self.num_nodes):
-                # Iterate through all nodes again to check for possible shorter paths
-                for v in range(self.num_nodes):
-                    # Check if there is a valid edge between nodes u and v
-                    if self.adjacency_matrix[u][v] > 0:
-                        # Relax the edge: Update distance if a shorter path is found
-                        if distances[u] + self.adjacency_matrix[u][v] < distances[v]:
-                            distances[v] = distances[u] + self.adjacency_matrix[u][v]
-
-        return distances  # Return the computed shortest distances from the source node using Bellman-Ford algorithm
-
-
-    def calculate_routing_table(self, algorithm):
-        # Calculate routing tables based on the selected algorithm
-        
-        # If the algorithm chosen is "Link State Routing"
-        if algorithm == "Link State Routing":
-            # Clear existing routing and forwarding tables
-            self.routing_table = {}
-            self.forwarding_table = {}
-            
-            # Calculate routing table for each node using Dijkstra's algorithm
-            for node in range(self.num_nodes):
-                self.routing_table[node] = self.dijkstra(node)
-        
-        # If the algorithm chosen is "Distance Vector Routing"
-        if algorithm == "Distance Vector Routing":
-            # Clear existing routing and forwarding tables
-            self.routing_table = {}
-            self.forwarding_table = {}
-            
-            # Calculate routing table for each node using Bellman-Ford algorithm
-            for node in range(self.num_nodes):
-                self.routing_table[node] = self.bellman_ford(node)
+    def ecmp_route(self, src, dst, flow):
+        # Route of one flow when every node hashes it onto one of its equal-cost next hops, [] when unreachable.
+        # All packets of a flow take the same route, different flows spread over the equal-cost paths
+        table = self.ecmp_table()
+        path = [src]
+        while path[-1] != dst:
+            hop = table.select(path[-1], dst, flow)
+            if hop is None:
+                return []
+            path.append(hop)
+        return path
 
+    def ecmp_balance(self, flows=None, flows_per_pair=1):
+        # Load-balance quality of ECMP against the single forwarded route: flows (src, dst, flow id) are routed both
+        # ways and the per-link flow counts compared by maximum, max/mean ratio and Jain's fairness index (1 when all
+        # links carry the same load). Without flows, every reachable ordered pair sends flows_per_pair flows
+        table = self.ecmp_table()
+        if flows is None:
+            flows = [(src, dst, (src * self.num_nodes + dst) * flows_per_pair + index)
+                     for src in range(self.num_nodes) for dst in range(self.num_nodes)
+                     if src != dst and self.forwarding_table[src][dst] is not None for index in range(flows_per_pair)]
+        flows = list(flows)
+        toward = self._sink_trees()
+        edges = [(u, v) for u, v, _ in self.graph.edges()]
+        single = dict.fromkeys(edges, 0)
+        spread = dict.fromkeys(edges, 0)
 
-    def generate_forwarding_table(self, algorithm):
-        # Ensure the routing table is up to date based on the selected algorithm
-        self.calculate_routing_table(algorithm)
-        
-        # Iterate through all source nodes
-        for src in range(self.num_nodes):
-            self.forwarding_table[src] = {}  # Initialize forwarding table for the source node
-            
-            available_nodes = []  # Initialize available_nodes from the source node
+        # Decoded next hops of every (node, destination) reached, shared by the flows crossing it
+        choices = {}
+        for src, dst, flow in flows:
+            node = src
+            while node != dst:
+                hop = toward[dst][node]
+                if hop is None or hop < 0:
+                    break
+                hop = int(hop)
+                single[(node, hop) if node < hop else (hop, node)] += 1
+                node = hop
 
-            # Collect available nodes based on adjacency matrix for the source node
-            for node, weight in enumerate(self.adjacency_matrix[src]):
-                if weight != 0:
-                    available_nodes.append(node)
+            node = src
+            while node != dst:
+                hops = choices.get((node, dst))
+                if hops is None:
+                    hops = choices[(node, dst)] = table.next_hops(node, dst)
+                if not hops:
+                    break
+                hop = hops[flow_hash(flow, node) % len(hops)]
+                spread[(node, hop) if node < hop else (hop, node)] += 1
+                node = hop
 
-            # Iterate through all destination nodes
+        # Pairs offering a choice, counted from the packed masks
+        pairs = multipath_pairs = next_hop_sum = 0
+        for src in range(self.num_nodes):
+            width, row = table.widths[src], table.rows[src]
             for dest in range(self.num_nodes):
-                if dest != src:  # Skip setting forwarding for the same source and destination nodes
-                    next_hop = None  # Initialize the next hop for routing
-                    
-                    # If the shortest path is direct access choose that over the what could be same a cost route. Example choose a-4-b rather then a-3-c-1-b. 
-                    # Reason being that if the intermediate node is equal to the destination we bypass it for the reason explained above it 
-                    if self.routing_table[src][dest] != self.adjacency_matrix[src][dest]:
-                        # Check for possible intermediate nodes for forwarding
-                        for intermediate_node in available_nodes:
-                            # If the destination is equal to the intermediate node skip it since self.routing_table[intermediate_node][dest] will be zero and mess wtih the algorithm
-                            if intermediate_node != dest:
-                                # Check if the intermediate node helps in forwarding to the destination
-                                if self.routing_table[src][intermediate_node] + self.routing_table[intermediate_node][dest] == self.routing_table[src][dest]:
-                                    next_hop = intermediate_node  # Set the intermediate node as the next hop
-                                    break
-                    
-                    # Set the forwarding based on whether a next hop is found or not
-                    if next_hop is None:
-                        self.forwarding_table[src][dest] = dest  # No intermediate node found; set destination as next hop
-                    else:
-                        self.forwarding_table[src][dest] = next_hop  # Set the next hop found as the forwarding destination
+                count = int.from_bytes(row[dest * width:(dest + 1) * width], "little").bit_count()
+                if count:
+                    pairs += 1
+                    next_hop_sum += count
+                    multipath_pairs += count > 1
+
+        def quality(loads):
+            values = list(loads.values())
+            total, squares = sum(values), sum(value * value for value in values)
+            mean = total / len(values) if values else 0
+            return {
+                "max_link_load": max(values, default=0),
+                "mean_link_load": mean,
+                "max_to_mean": max(values) / mean if mean else None,
+                "jain_fairness": total * total / (len(values) * squares) if squares else None,
+                "unused_links": sum(1 for value in values if not value),
+            }
+
+        single_quality, ecmp_quality = quality(single), quality(spread)
+        return {
+            "flows": len(flows),
+            "pairs": pairs,
+            "multipath_pairs": multipath_pairs,
+            "average_next_hops": next_hop_sum / pairs if pairs else None,
+            "table_bytes": table.nbytes(),
+            "single_path": single_quality,
+            "ecmp": ecmp_quality,
+            "max_load_reduction": (1 - ecmp_quality["max_link_load"] / single_quality["max_link_load"]
+                                   if single_quality["max_link_load"] else 0.0),
+        }
+
+    def area_routing(self, area_size=None, areas=None):
+        # OSPF-style hierarchical Link State routing over the current links: areas gives the area of every node,
+        # otherwise connected areas of up to area_size nodes (AREA_SIZE by default) are grown from the topology.
+        # Returns an AreaRouting answering distances and routes without the flat V x V tables
+        if areas is None:
+            areas = partition_areas(self.graph, AREA_SIZE if area_size is None else area_size)
+        elif len(areas) != self.num_nodes:
+            raise ValueError(f"Expected an area for each of the {self.num_nodes} nodes, got {len(areas)}")
+        else:
+            # Any hashable area labels, numbered in order of first appearance
+            numbers = {}
+            areas = [numbers.setdefault(area, len(numbers)) for area in areas]
+        with self.phase("area_routing"):
+            return AreaRouting(self._current_csr(), areas, self._counters())
 
+    def layout(self, progress=None):
+        # Node positions for drawing, computed once per generated topology and shared by every view. Link cost changes
+        # and failures keep them, so nodes stay in place between views and edits
+        if self._layout is None:
+            with self.phase("layout"):
+                self._layout = compute_layout(self.num_nodes, self.graph.edges(), progress=progress)
+        return self._layout
+
+    def forwarding_edges(self, source, destination):
+        # Links the forwarding tables use to reach every destination from source, and the links of the route to
+        # destination in path order. Unreachable destinations contribute no links
+        tree_edges = {}  # Insertion-ordered set
+        route_edges = []
+
+        # Loop through all nodes except the source node
+        for dst in range(self.num_nodes):
+            if dst == source:
+                continue
+            start = source
+            next_node = self.forwarding_table[source][dst]
+
+            # Follow the next hops until the destination is reached
+            while next_node is not None:
+                tree_edges[(start, next_node)] = None
+                if dst == destination:
+                    route_edges.append((start, next_node))
+                if next_node == dst:
+                    break
+                start = next_node
+                next_node = self.forwarding_table[next_node][dst]
+
+        return list(tree_edges), route_edges
 
     def visualize_topology(self):
         # Create an empty graph using NetworkX library
         G = nx.Graph()
         
-        # Iterate through nodes to establish edges based on adjacency matrix
-        for i in range(self.num_nodes):
-            for j in range(i + 1, self.num_nodes):
-                # Check if there is a connection between nodes i and j in the adjacency matrix
-                if self.adjacency_matrix[i][j] > 0:
-                    # Add an edge between nodes i and j with a weight from the adjacency matrix
-                    G.add_edge(i, j, weight=self.adjacency_matrix[i][j])
+        # Iterate through the links of the storage backend to establish edges
+        for i, j, weight in self.graph.edges():
+            # Add an edge between nodes i and j with the weight of the link
+            G.add_edge(i, j, weight=weight)
 
         return G  # Return the graph representing the network topology
 
@@ -202,37 +2486,1211 @@ class NetworkTopology:
         # Create an empty graph using NetworkX library
         G = nx.Graph()
 
-        # List to store edges representing the forwarding path
-        forwarding_edges = []
-
-        # Loop through all nodes except the source node
-        for dst in range(self.num_nodes):
-            if dst != source:
-                start = source  # Set the starting node as the source node
-                next_node = self.forwarding_table[source][dst]  # Get the next node in the forwarding table
-
-                # Traverse the path until the destination is reached
-                while next_node != dst:
-                    # Add edges to the graph representing the forwarding path
-                    G.add_edge(start, next_node, weight=self.adjacency_matrix[start][next_node])
-                    
-                    # Check if the current destination is the final destination, store forwarding edges
-                    if dst == destination:
-                        forwarding_edges.append((start, next_node))
-                    
-                    start = next_node  # Update the start node
-                    next_node = self.forwarding_table[next_node][dst]  # Move to the next node in the forwarding table
-
-                # Add the final edge to the graph for the path
-                G.add_edge(start, next_node, weight=self.adjacency_matrix[start][next_node])
-                
-                # Check if the current destination is the final destination, store forwarding edges
-                if dst == destination:
-                    forwarding_edges.append((start, next_node))
+        # Links of the forwarding paths from the source, and the ones on the way to the destination
+        tree_edges, forwarding_edges = self.forwarding_edges(source, destination)
+        for i, j in tree_edges:
+            G.add_edge(i, j, weight=self.graph.weight(i, j))
 
         return G, forwarding_edges  # Return the graph and forwarding edges representing the route
 
 
+class DistanceVectorSimulator:
+    # Message-passing distance-vector protocol: every node only knows its own vector and the advertisements its
+    # neighbors send it. Message sizes follow RIP: a 4 byte header and 20 bytes per route, at most 25 routes a message
+    HEADER_BYTES = 4
+    ENTRY_BYTES = 20
+    ENTRIES_PER_MESSAGE = 25
+
+    def __init__(self, network, mode="sync", triggered_updates=True, split_horizon=True, poison_reverse=False,
+                 infinity=None, seed=None):
+        if mode not in ("sync", "async"):
+            raise ValueError(f"Unknown distance vector mode: {mode}")
+        self.network = network
+        self.mode = mode
+        self.triggered_updates = triggered_updates  # Advertise only the routes that changed instead of the full vector
+        self.split_horizon = split_horizon  # Do not advertise a route back to the neighbor it was learned from
+        self.poison_reverse = poison_reverse  # Advertise it back as unreachable instead of leaving it out
+        self.random = random.Random(seed)  # Drives the delivery delays of the asynchronous mode
+
+        # Any metric reaching infinity is treated as unreachable, by default one more than the longest possible path
+        if infinity is None:
+            max_weight = max((w for _, _, w in network.graph.edges()), default=1)
+            infinity = max_weight * max(network.num_nodes - 1, 1) + 1
+        self.infinity = infinity
+
+        self.reset()
+
+    def reset(self):
+        # Every node starts out knowing only the route to itself
+        num_nodes = self.network.num_nodes
+        self.distances = [[float('inf')] * num_nodes for _ in range(num_nodes)]
+        self.next_hops = [[None] * num_nodes for _ in range(num_nodes)]
+        for node in range(num_nodes):
+            self.distances[node][node] = 0
+            self.next_hops[node][node] = node
+
+        # Routes changed since the node last advertised, the self route is the first thing every node announces
+        self.pending = [{node} for node in range(num_nodes)]
+
+        # Convergence counters
+        self.stats = {"mode": self.mode, "rounds": 0, "messages": 0, "bytes": 0, "route_updates": 0,
+                      "converged": False, "history": []}
+
+    def advertisement(self, node, neighbor, dests):
+        # Build the (destination, metric) entries node sends to one neighbor, applying split horizon/poison reverse
+        distances = self.distances[node]
+        next_hops = self.next_hops[node]
+        entries = []
+        for dest in dests:
+            metric = distances[dest]
+            if next_hops[dest] == neighbor and dest != neighbor:
+                if self.poison_reverse:
+                    metric = float('inf')
+                elif self.split_horizon:
+                    continue
+            entries.append((dest, metric))
+        return entries
+
+    def send_updates(self, node):
+        # Turn the pending changes of a node into one advertisement per neighbor and account for their cost
+        if self.triggered_updates:
+            dests = sorted(self.pending[node])
+        else:
+            dests = [dest for dest, metric in enumerate(self.distances[node]) if metric != float('inf')]
+        self.pending[node] = set()
+
+        outgoing = []
+        for neighbor, _ in self.network.graph.neighbors(node):
+            entries = self.advertisement(node, neighbor, dests)
+            if not entries:
+                continue
+            messages = -(-len(entries) // self.ENTRIES_PER_MESSAGE)
+            self.stats["messages"] += messages
+            self.stats["bytes"] += messages * self.HEADER_BYTES + len(entries) * self.ENTRY_BYTES
+            outgoing.append((node, neighbor, entries))
+        return outgoing
+
+    def receive(self, sender, receiver, entries):
+        # Apply an advertisement from a neighbor to the receiver's vector, returning whether anything changed
+        link_cost = self.network.graph.weight(receiver, sender)
+        distances = self.distances[receiver]
+        next_hops = self.next_hops[receiver]
+        changed = False
+
+        for dest, metric in entries:
+            if dest == receiver:
+                continue
+            new_dist = metric + link_cost
+            if new_dist >= self.infinity:
+                new_dist = float('inf')
+
+            if next_hops[dest] == sender:
+                # The current route goes through the sender, so its news is taken even when it got worse
+                if new_dist == distances[dest]:
+                    continue
+                distances[dest] = new_dist
+                next_hops[dest] = sender if new_dist != float('inf') else None
+            elif new_dist < distances[dest] or (new_dist == distances[dest] and new_dist != float('inf')
+                                                and prefer_first_hop(dest, sender, next_hops[dest])):
+                distances[dest] = new_dist
+                next_hops[dest] = sender
+            else:
+                continue
+
+            self.pending[receiver].add(dest)
+            self.stats["route_updates"] += 1
+            changed = True
+
+        return changed
+
+    def run(self, max_rounds=None, max_messages=None):
+        # Exchange vectors until no node has anything new to say, returning the convergence counters
+        if self.mode == "sync":
+            self._run_synchronous(max_rounds)
+        else:
+            self._run_asynchronous(max_rounds, max_messages)
+        return self.stats
+
+    def _run_synchronous(self, max_rounds):
+        # Lock-step rounds: all nodes that changed in the previous round advertise, then all messages are delivered
+        active = [node for node in range(self.network.num_nodes) if self.pending[node]]
+
+        while active:
+            if max_rounds is not None and self.stats["rounds"] >= max_rounds:
+                return
+            self.stats["rounds"] += 1
+            messages_before, bytes_before = self.stats["messages"], self.stats["bytes"]
+
+            # Every advertisement of the round is built before any is delivered
+            outbox = []
+            for node in active:
+                outbox.extend(self.send_updates(node))
+
+            # Only nodes whose vector changed take part in the next round
+            changed_nodes = set()
+            for sender, receiver, entries in outbox:
+                if self.receive(sender, receiver, entries):
+                    changed_nodes.add(receiver)
+            active = sorted(changed_nodes)
+
+            self.stats["history"].append({"round": self.stats["rounds"], "active_nodes": len(changed_nodes),
+                                          "messages": self.stats["messages"] - messages_before,
+                                          "bytes": self.stats["bytes"] - bytes_before})
+
+        self.stats["converged"] = True
+
+    def _run_asynchronous(self, max_rounds, max_messages):
+        # Event-driven delivery with random per-message delays; a node reacts to each advertisement as it arrives.
+        # The reported rounds are the longest causal chain of updates, the asynchronous analogue of lock-step rounds
+        events = []
+        sequence = 0
+        link_clock = {}  # Last delivery time per directed link, links deliver in order like a real FIFO link
+
+        def schedule(now, generation, outgoing):
+            nonlocal sequence
+            for sender, receiver, entries in outgoing:
+                sequence += 1
+                arrival = max(now + self.random.random(), link_clock.get((sender, receiver), 0.0))
+                link_clock[(sender, receiver)] = arrival
+                heappush(events, (arrival, sequence, generation, sender, receiver, entries))
+
+        for node in range(self.network.num_nodes):
+            if self.pending[node]:
+                schedule(0.0, 1, self.send_updates(node))
+
+        delivered = 0
+        while events:
+            if max_messages is not None and delivered >= max_messages:
+                return
+            now, _, generation, sender, receiver, entries = heappop(events)
+            if max_rounds is not None and generation > max_rounds:
+                return
+            delivered += 1
+            self.stats["rounds"] = max(self.stats["rounds"], generation)
+
+            # Triggered update: a receiver whose vector changed advertises right away
+            if self.receive(sender, receiver, entries):
+                schedule(now, generation + 1, self.send_updates(receiver))
+
+        self.stats["converged"] = True
+
+    def routing_table(self):
+        # Distance vectors of all nodes in the same {src: row} layout as NetworkTopology.routing_table
+        return {node: distances[:] for node, distances in enumerate(self.distances)}
+
+    def forwarding_table(self):
+        # Next hops of all nodes in the same {src: {dest: next_hop}} layout as NetworkTopology.forwarding_table
+        num_nodes = self.network.num_nodes
+        return {src: {dest: self.next_hops[src][dest] for dest in range(num_nodes) if dest != src}
+                for src in range(num_nodes)}
+
+
+# Default number of nodes per area of the hierarchical (OSPF-style) routing
+AREA_SIZE = 256
+
+
+def partition_areas(graph, area_size=AREA_SIZE):
+    # Split the nodes into connected areas of at most area_size nodes, grown breadth-first from the lowest unassigned
+    # node. A leftover piece smaller than half an area is merged into a neighboring area that still has room for it
+    # instead of standing alone. Returns the area id of every node
+    if area_size < 1:
+        raise ValueError(f"Areas need at least one node, got {area_size}")
+    area_of = [-1] * graph.num_nodes
+    sizes = []
+    count = 0
+    for seed in range(graph.num_nodes):
+        if area_of[seed] >= 0:
+            continue
+        area_of[seed] = count
+        members = [seed]
+        frontier = deque(members)
+        while frontier and len(members) < area_size:
+            node = frontier.popleft()
+            for neighbor, _ in graph.neighbors(node):
+                if area_of[neighbor] < 0 and len(members) < area_size:
+                    area_of[neighbor] = count
+                    members.append(neighbor)
+                    frontier.append(neighbor)
+
+        adjacent = [area_of[neighbor] for node in members for neighbor, _ in graph.neighbors(node)
+                    if 0 <= area_of[neighbor] != count and sizes[area_of[neighbor]] + len(members) <= area_size] \
+            if len(members) < area_size // 2 else []
+        if adjacent:
+            for node in members:
+                area_of[node] = adjacent[0]
+            sizes[adjacent[0]] += len(members)
+        else:
+            sizes.append(len(members))
+            count += 1
+    return area_of
+
+
+def essential_border_links(distances, num_borders):
+    # Intra-area shortcuts kept between the borders of one area, given their flat num_borders x num_borders distance
+    # block: (i, j, distance) for i < j, leaving out the pairs whose distance is also reached through a third border.
+    # Link costs are positive, so every dropped pair splits into two closer pairs and the backbone distances stay exact
+    if np is not None:
+        block = np.frombuffer(distances, dtype=np.float64).reshape(num_borders, num_borders)
+        redundant = np.zeros((num_borders, num_borders), dtype=bool)
+        for k in range(num_borders):
+            through = (block[:, k, None] + block[None, k, :]) == block
+            through[k, :] = False
+            through[:, k] = False
+            redundant |= through
+        keep = np.triu(~redundant & np.isfinite(block), 1)
+        return [(i, j, int(block[i, j])) for i, j in zip(*(index.tolist() for index in np.nonzero(keep)))]
+
+    links = []
+    for i in range(num_borders):
+        row = distances[i * num_borders:(i + 1) * num_borders]
+        for j in range(i + 1, num_borders):
+            dist = row[j]
+            if dist == float('inf'):
+                continue
+            if not any(k != i and k != j and row[k] + distances[k * num_borders + j] == dist
+                       for k in range(num_borders)):
+                links.append((i, j, int(dist)))
+    return links
+
+
+class AreaRouting:
+    # Two-level link-state routing in the spirit of OSPF areas. Every area keeps shortest-path tables over its own
+    # links only; the border nodes (those with a link into another area) form a backbone whose links are the
+    # inter-area links plus intra-area shortcuts between the borders of each area, and the backbone tables give the
+    # cost between any two borders. A route to another area is summarized as the best exit border, backbone cost and
+    # entry border. Tables take O(sum of area sizes squared + borders squared) entries instead of O(V^2), and the
+    # answers equal the flat computation because every path splits into intra-area pieces between border crossings.
+    # All tables are flat array('d') distances with predecessors in array('i') (-1 for none)
+    def __init__(self, graph, area_of, counters=None):
+        self.num_nodes = graph.num_nodes
+        self.area_of = list(area_of)
+
+        # Members of every area and the index of each node inside its area
+        self.members = []
+        self.local = [0] * self.num_nodes
+        for node, area in enumerate(self.area_of):
+            while area >= len(self.members):
+                self.members.append([])
+            self.local[node] = len(self.members[area])
+            self.members[area].append(node)
+
+        # Split the links into intra-area links and the inter-area links between borders
+        area_edges = [[] for _ in self.members]
+        inter_area = []
+        for u, v, w in graph.edges():
+            if self.area_of[u] == self.area_of[v]:
+                area_edges[self.area_of[u]].append((self.local[u], self.local[v], w))
+            else:
+                inter_area.append((u, v, w))
+
+        # Intra-area all-pairs tables, one Dijkstra per member over the links of its area
+        self.intra_distances = []
+        self.intra_parents = []
+        for members, edges in zip(self.members, area_edges):
+            size = len(members)
+            local_graph = CSRGraph.from_edges(size, edges)
+            distances = array('d')
+            parents = array('i')
+            heap = []
+            for src in range(size):
+                row_distances = [float('inf')] * size
+                row_parents = [None] * size
+                dijkstra_csr(local_graph.offsets, local_graph.targets, local_graph.weights, src, row_distances, heap,
+                             [None] * size, row_parents, counters)
+                distances.extend(row_distances)
+                parents.extend([-1 if parent is None else parent for parent in row_parents])
+            self.intra_distances.append(distances)
+            self.intra_parents.append(parents)
+
+        # Border nodes, globally numbered for the backbone and listed per area
+        self.borders = sorted({node for u, v, _ in inter_area for node in (u, v)})
+        self.border_index = {node: index for index, node in enumerate(self.borders)}
+        self.area_borders = [[] for _ in self.members]
+        for node in self.borders:
+            self.area_borders[self.area_of[node]].append(node)
+
+        # Backbone links: the inter-area links plus the intra-area shortcuts that no other border already realizes
+        backbone_edges = [(self.border_index[u], self.border_index[v], w) for u, v, w in inter_area]
+        for area, borders in enumerate(self.area_borders):
+            size = len(self.members[area])
+            distances = self.intra_distances[area]
+            block = array('d', [distances[self.local[u] * size + self.local[v]] for u in borders for v in borders])
+            backbone_edges.extend((self.border_index[borders[i]], self.border_index[borders[j]], dist)
+                                  for i, j, dist in essential_border_links(block, len(borders)))
+        self.backbone_links = len(backbone_edges)
+
+        # Backbone all-pairs tables between borders
+        num_borders = len(self.borders)
+        backbone = CSRGraph.from_edges(num_borders, backbone_edges)
+        self.backbone_distances = array('d')
+        self.backbone_parents = array('i')
+        heap = []
+        for src in range(num_borders):
+            row_distances = [float('inf')] * num_borders
+            row_parents = [None] * num_borders
+            dijkstra_csr(backbone.offsets, backbone.targets, backbone.weights, src, row_distances, heap,
+                         [None] * num_borders, row_parents, counters)
+            self.backbone_distances.extend(row_distances)
+            self.backbone_parents.extend([-1 if parent is None else parent for parent in row_parents])
+
+    def intra_distance(self, u, v):
+        # Cost between two nodes of the same area using its links only
+        size = len(self.members[self.area_of[u]])
+        return self.intra_distances[self.area_of[u]][self.local[u] * size + self.local[v]]
+
+    def _exits(self, src):
+        # Summary of src towards the backbone: the cost to reach every border from src through the border of its
+        # area it leaves by, as a list over the backbone and the exit border used for each
+        num_borders = len(self.borders)
+        costs = [float('inf')] * num_borders
+        exits = [None] * num_borders
+        for border in self.area_borders[self.area_of[src]]:
+            to_border = self.intra_distance(src, border)
+            if to_border == float('inf'):
+                continue
+            start = self.border_index[border] * num_borders
+            for index, dist in enumerate(self.backbone_distances[start:start + num_borders]):
+                if to_border + dist < costs[index]:
+                    costs[index] = to_border + dist
+                    exits[index] = border
+        return costs, exits
+
+    def _best(self, src, dst, costs=None):
+        # Cheapest way from src to dst as (cost, exit border, entry border), both borders None for an intra-area route.
+        # An intra-area route wins ties, like OSPF prefers intra-area paths
+        if costs is None:
+            costs, exits = self._exits(src)
+        else:
+            costs, exits = costs
+        best = (self.intra_distance(src, dst), None, None) if self.area_of[src] == self.area_of[dst] else \
+            (float('inf'), None, None)
+        for border in self.area_borders[self.area_of[dst]]:
+            index = self.border_index[border]
+            cost = costs[index] + self.intra_distance(border, dst)
+            if cost < best[0]:
+                best = (cost, exits[index], border)
+        return best
+
+    def distance(self, src, dst):
+        # Cost of the cheapest route from src to dst, infinity when unreachable
+        cost = self._best(src, dst)[0] if src != dst else 0
+        return cost if cost == float('inf') else int(cost)
+
+    def distances_from(self, src):
+        # Row of costs from src to every node, like one row of the flat routing table
+        if np is None:
+            summary = self._exits(src)
+            row = [self._best(src, dst, summary)[0] if dst != src else 0 for dst in range(self.num_nodes)]
+            return [dist if dist == float('inf') else int(dist) for dist in row]
+
+        # Vectorized: the exit costs are a min-plus product of the row of src with the backbone table, and every
+        # area is entered through the min-plus product of those costs with the border rows of its table
+        num_borders = len(self.borders)
+        area = self.area_of[src]
+        size = len(self.members[area])
+        own = np.frombuffer(self.intra_distances[area], dtype=np.float64)[self.local[src] * size:][:size]
+        row = np.full(self.num_nodes, np.inf)
+        row[self.members[area]] = own
+        costs = np.full(num_borders, np.inf)
+        if num_borders:
+            backbone = np.frombuffer(self.backbone_distances, dtype=np.float64).reshape(num_borders, num_borders)
+            exits = self.area_borders[area]
+            if exits:
+                to_exits = own[[self.local[border] for border in exits]]
+                costs = (to_exits[:, None] + backbone[[self.border_index[border] for border in exits]]).min(axis=0)
+        for other, borders in enumerate(self.area_borders):
+            if not borders:
+                continue
+            size = len(self.members[other])
+            table = np.frombuffer(self.intra_distances[other], dtype=np.float64).reshape(size, size)
+            entries = [self.local[border] for border in borders]
+            through = (costs[[self.border_index[border] for border in borders]][:, None] + table[entries]).min(axis=0)
+            row[self.members[other]] = np.minimum(row[self.members[other]], through)
+        return [0 if dst == src else (float('inf') if dist == np.inf else int(dist))
+                for dst, dist in enumerate(row.tolist())]
+
+    def _intra_path(self, u, v):
+        # Nodes of the shortest path from u to v inside their area, walked back along the predecessors of u's tree
+        area = self.area_of[u]
+        size = len(self.members[area])
+        parents = self.intra_parents[area]
+        start = self.local[u] * size
+        path = [self.local[v]]
+        while path[-1] != self.local[u]:
+            path.append(parents[start + path[-1]])
+        return [self.members[area][node] for node in reversed(path)]
+
+    def route(self, src, dst):
+        # Full route from src to dst: inside the area of src to the exit border, over the backbone (expanding
+        # intra-area shortcuts into their links) to the entry border, and inside the destination area. [] if unreachable
+        if src == dst:
+            return [src]
+        cost, exit_border, entry_border = self._best(src, dst)
+        if cost == float('inf'):
+            return []
+        if exit_border is None:
+            return self._intra_path(src, dst)
+
+        # Backbone path between the two borders, from the predecessors of the exit border's backbone tree
+        num_borders = len(self.borders)
+        start = self.border_index[exit_border] * num_borders
+        backbone_path = [self.border_index[entry_border]]
+        while backbone_path[-1] != self.border_index[exit_border]:
+            backbone_path.append(self.backbone_parents[start + backbone_path[-1]])
+        backbone_path = [self.borders[index] for index in reversed(backbone_path)]
+
+        path = self._intra_path(src, exit_border)
+        for u, v in zip(backbone_path, backbone_path[1:]):
+            if self.area_of[u] == self.area_of[v]:
+                path.extend(self._intra_path(u, v)[1:])
+            else:
+                path.append(v)
+        path.extend(self._intra_path(entry_border, dst)[1:])
+        return path
+
+    def next_hop(self, src, dst):
+        # Forwarding entry of src towards dst, None when unreachable
+        path = self.route(src, dst)
+        return path[1] if len(path) > 1 else None
+
+    def stats(self):
+        # Size of the hierarchy and of its tables against the flat V x V table
+        sizes = [len(members) for members in self.members]
+        intra_entries = sum(size * size for size in sizes)
+        backbone_entries = len(self.borders) ** 2
+        return {
+            "areas": len(sizes),
+            "largest_area": max(sizes, default=0),
+            "border_nodes": len(self.borders),
+            "backbone_links": self.backbone_links,
+            "table_entries": intra_entries + backbone_entries,
+            "flat_table_entries": self.num_nodes * self.num_nodes,
+            "table_bytes": sum(table.itemsize * len(table) for tables in (self.intra_distances, self.intra_parents)
+                               for table in tables)
+                           + (self.backbone_distances.itemsize + self.backbone_parents.itemsize) * backbone_entries,
+        }
+
+    def validate(self, routing_table, graph, sources=None):
+        # Compare against flat routing tables ({src: distances}) over the same links: every distance must match and
+        # every route must be a chain of existing links costing exactly that distance
+        sources = range(self.num_nodes) if sources is None else sources
+        checked = distance_mismatches = invalid_routes = 0
+        for src in sources:
+            flat = list(routing_table[src])
+            distance_mismatches += sum(1 for mine, theirs in zip(self.distances_from(src), flat) if mine != theirs)
+            for dst in range(self.num_nodes):
+                if dst == src:
+                    continue
+                checked += 1
+                path = self.route(src, dst)
+                if not path:
+                    invalid_routes += flat[dst] != float('inf')
+                    continue
+                weights = [graph.weight(u, v) for u, v in zip(path, path[1:])]
+                invalid_routes += (path[0] != src or path[-1] != dst or not all(weights)
+                                   or sum(weights) != flat[dst])
+        return {"pairs": checked, "distance_mismatches": distance_mismatches, "invalid_routes": invalid_routes}
+
+
+class PacketSimulator:
+    # Discrete-event packet simulation over the forwarding tables of a topology. Every link is two directed ports
+    # (indexed by their position in the CSR rows) with a bandwidth, a propagation delay proportional to its cost and a
+    # drop-tail FIFO queue. Flows inject packets with Poisson or bursty (on/off) arrivals, which are forwarded hop by
+    # hop with forwarding_table until delivered or dropped.
+    # Packets are rows of typed arrays recycled through a free list and events are (time, id << 2 | kind) pairs on a
+    # heap, so the simulation allocates nothing per packet beyond its heap entries. Times are in milliseconds
+    GENERATE, ARRIVE, TRANSMITTED = 0, 1, 2
+
+    # Defaults matching the old per-packet estimate: 1.3 ms per unit of link cost and 1.7 ms per hop
+    PROPAGATION_MS_PER_COST = 1.3
+    PROCESSING_MS = 1.7
+
+    def __init__(self, network, bandwidth_mbps=10, packet_size=1000, queue_capacity=64, propagation_ms_per_cost=None,
+                 processing_ms=None, link_bandwidths=None, seed=None):
+        if not network.forwarding_table or not network.tables_current():
+            raise ValueError("The topology has no up-to-date forwarding tables to simulate")
+        if bandwidth_mbps <= 0 or packet_size <= 0 or queue_capacity < 0:
+            raise ValueError("Bandwidth and packet size must be positive and the queue capacity non-negative")
+        self.network = network
+        self.packet_size = packet_size  # Bytes
+        self.queue_capacity = queue_capacity  # Packets waiting behind the one being transmitted
+        self.processing_ms = self.PROCESSING_MS if processing_ms is None else processing_ms
+        self.random = random.Random(seed)
+
+        # Directed links: u -> targets[i] for offsets[u] <= i < offsets[u + 1]
+        graph = network._current_csr()
+        self.offsets, self.targets = graph.offsets, graph.targets
+        num_links = len(graph.targets)
+        per_cost = self.PROPAGATION_MS_PER_COST if propagation_ms_per_cost is None else propagation_ms_per_cost
+        self.link_propagation = array('d', (weight * per_cost for weight in graph.weights))
+
+        # Transmission time of one packet on every link, from the default bandwidth or the per-link overrides
+        bits = packet_size * 8
+        self.wire_ms = bits / (bandwidth_mbps * 1000)  # Transmission time at the default bandwidth
+        self.link_transmission = array('d', [self.wire_ms]) * num_links
+        for (u, v), mbps in (link_bandwidths or {}).items():
+            self.link_transmission[self.link_index(u, v)] = bits / (mbps * 1000)
+
+        self.link_sending = bytearray(num_links)  # Whether a packet is on the wire
+        self.link_queues = [None] * num_links  # FIFO of packet ids, created when a link first gets congested
+        self.link_busy = array('d', [0.0]) * num_links  # Total transmission time
+        self.link_packets = array('q', [0]) * num_links
+        self.link_drops = array('q', [0]) * num_links
+        self.next_links = {}  # node * num_nodes + destination -> outgoing link, -1 without a route
+
+        # Flows
+        self.flow_src = array('i')
+        self.flow_dst = array('i')
+        self.flow_rate = array('d')  # Packets per millisecond
+        self.flow_burst = array('d')  # Mean packets per burst, 0 for Poisson arrivals
+        self.flow_burst_left = array('i')  # Packets left in the current burst
+        self.flow_sent = array('q')
+        self.flow_delivered = array('q')
+        self.flow_latency = array('d')  # Sum over delivered packets
+
+        # Packets
+        self.packet_flow = array('i')
+        self.packet_node = array('i')
+        self.packet_link = array('i')
+        self.packet_hops = array('i')
+        self.packet_created = array('d')
+        self.free_packets = []
+
+        self.events = []
+        self.now = 0.0
+        self.latencies = array('d')  # Of every delivered packet
+        self.stats = {"events": 0, "sent": 0, "delivered": 0, "drops": {"queue": 0, "no_route": 0, "ttl": 0}}
+
+    def link_index(self, u, v):
+        # Position of the directed link u -> v in the CSR rows, which are sorted by target
+        start, end = self.offsets[u], self.offsets[u + 1]
+        i = bisect_left(self.targets, v, start, end)
+        if i == end or self.targets[i] != v:
+            raise ValueError(f"There is no link between {u} and {v}")
+        return i
+
+    def add_flow(self, src, dst, rate, arrivals="poisson", burst_size=10):
+        # Traffic from src to dst at rate packets per second on average. "poisson" spaces packets exponentially,
+        # "bursty" sends bursts of geometrically distributed size (burst_size on average) back to back, separated by
+        # exponential silences that keep the same average rate
+        if arrivals not in ("poisson", "bursty"):
+            raise ValueError(f"Unknown arrival process: {arrivals}")
+        if src == dst or rate <= 0:
+            raise ValueError("A flow needs distinct end points and a positive rate")
+        flow = len(self.flow_src)
+        self.flow_src.append(src)
+        self.flow_dst.append(dst)
+        self.flow_rate.append(rate / 1000)
+        self.flow_burst.append(burst_size if arrivals == "bursty" else 0)
+        self.flow_burst_left.append(0)
+        for column in (self.flow_sent, self.flow_delivered):
+            column.append(0)
+        self.flow_latency.append(0.0)
+        heappush(self.events, (self.now + self._next_gap(flow), flow << 2 | self.GENERATE))
+        return flow
+
+    def add_traffic_matrix(self, matrix, arrivals="poisson", burst_size=10):
+        # Add one flow per non-zero entry of a {(src, dst): rate} dict or a nested list of rates in packets per second
+        if isinstance(matrix, Mapping):
+            entries = matrix.items()
+        else:
+            entries = (((src, dst), rate) for src, row in enumerate(matrix) for dst, rate in enumerate(row))
+        return [self.add_flow(src, dst, rate, arrivals, burst_size) for (src, dst), rate in entries if rate]
+
+    def add_random_flows(self, count, rate, arrivals="poisson", burst_size=10):
+        # Add count flows between random distinct node pairs, each at rate packets per second
+        num_nodes = self.network.num_nodes
+        flows = []
+        for _ in range(count):
+            src, dst = self.random.sample(range(num_nodes), 2)
+            flows.append(self.add_flow(src, dst, rate, arrivals, burst_size))
+        return flows
+
+    def _next_gap(self, flow):
+        # Time until the next packet of a flow
+        rate = self.flow_rate[flow]
+        burst = self.flow_burst[flow]
+        if not burst:
+            return self.random.expovariate(rate)
+        if self.flow_burst_left[flow] > 0:
+            # Inside a burst packets follow each other back to back at the default bandwidth
+            self.flow_burst_left[flow] -= 1
+            return self.wire_ms
+        # Start a new burst after a silence. Sizes are geometric with mean burst and the silences are shortened by the
+        # time spent inside bursts, so the average stays at rate
+        size = 1
+        while self.random.random() > 1 / burst:
+            size += 1
+        self.flow_burst_left[flow] = size - 1
+        silence = max(burst / rate - (burst - 1) * self.wire_ms, self.wire_ms)
+        return self.random.expovariate(1 / silence)
+
+    def _next_link(self, node, dst):
+        hop = self.network.forwarding_table[node][dst]
+        return -1 if hop is None else self.link_index(node, hop)
+
+    def run(self, duration_ms, max_events=None):
+        # Advance the simulation by duration_ms (or until max_events more events) and return summary()
+        end = self.now + duration_ms
+        events = self.events
+        num_nodes = self.network.num_nodes
+        max_hops = num_nodes  # A packet still travelling after this many hops is caught in a forwarding loop
+        flow_dst, flow_sent, flow_delivered, flow_latency = self.flow_dst, self.flow_sent, self.flow_delivered, \
+            self.flow_latency
+        packet_flow, packet_node, packet_link, packet_hops, packet_created = self.packet_flow, self.packet_node, \
+            self.packet_link, self.packet_hops, self.packet_created
+        link_sending, link_queues, link_transmission, link_propagation = self.link_sending, self.link_queues, \
+            self.link_transmission, self.link_propagation
+        link_busy, link_packets, link_drops, targets = self.link_busy, self.link_packets, self.link_drops, self.targets
+        next_links, free_packets, latencies, drops = self.next_links, self.free_packets, self.latencies, \
+            self.stats["drops"]
+        queue_capacity, processing_ms = self.queue_capacity, self.processing_ms
+        GENERATE, TRANSMITTED = self.GENERATE, self.TRANSMITTED
+        processed = 0
+        now = self.now
+
+        while events and events[0][0] <= end:
+            if max_events is not None and processed >= max_events:
+                end = now  # Out of budget, the clock stops at the last event
+                break
+            now, code = heappop(events)
+            processed += 1
+            kind = code & 3
+            ident = code >> 2
+
+            if kind == TRANSMITTED:
+                # The packet left the wire: it reaches the other end after propagation and processing,
+                # and the next queued packet starts transmitting
+                link = packet_link[ident]
+                link_busy[link] += link_transmission[link]
+                link_packets[link] += 1
+                packet_node[ident] = targets[link]
+                heappush(events, (now + link_propagation[link] + processing_ms, ident << 2 | 1))
+                queue = link_queues[link]
+                if queue:
+                    heappush(events, (now + link_transmission[link], queue.popleft() << 2 | TRANSMITTED))
+                else:
+                    link_sending[link] = 0
+                continue
+
+            if kind == GENERATE:
+                # A new packet of the flow appears at its source, the next one is scheduled right away
+                flow = ident
+                if free_packets:
+                    packet = free_packets.pop()
+                    packet_flow[packet] = flow
+                    packet_created[packet] = now
+                    packet_hops[packet] = 0
+                else:
+                    packet = len(packet_flow)
+                    packet_flow.append(flow)
+                    packet_node.append(0)
+                    packet_link.append(-1)
+                    packet_hops.append(0)
+                    packet_created.append(now)
+                node = packet_node[packet] = self.flow_src[flow]
+                flow_sent[flow] += 1
+                heappush(events, (now + self._next_gap(flow), code))
+            else:
+                packet = ident
+                node = packet_node[packet]
+                flow = packet_flow[packet]
+
+            # Deliver the packet or hand it to the outgoing link towards its destination
+            dst = flow_dst[flow]
+            if node == dst:
+                latency = now - packet_created[packet]
+                latencies.append(latency)
+                flow_delivered[flow] += 1
+                flow_latency[flow] += latency
+                free_packets.append(packet)
+                continue
+
+            key = node * num_nodes + dst
+            link = next_links.get(key)
+            if link is None:
+                link = next_links[key] = self._next_link(node, dst)
+            if link < 0 or packet_hops[packet] >= max_hops:
+                drops["no_route" if link < 0 else "ttl"] += 1
+                free_packets.append(packet)
+                continue
+            packet_hops[packet] += 1
+            packet_link[packet] = link
+
+            if not link_sending[link]:
+                link_sending[link] = 1
+                heappush(events, (now + link_transmission[link], packet << 2 | TRANSMITTED))
+                continue
+            queue = link_queues[link]
+            if queue is None:
+                queue = link_queues[link] = deque()
+            if len(queue) >= queue_capacity:
+                # Drop-tail: the queue is full
+                drops["queue"] += 1
+                link_drops[link] += 1
+                free_packets.append(packet)
+                continue
+            queue.append(packet)
+
+        # Events after the period stay queued for the next run
+        self.now = end
+        self.stats["events"] += processed
+        return self.summary()
+
+    def summary(self):
+        # Throughput, drops, latency distribution and link utilization since the simulation started
+        elapsed = self.now
+        sent = sum(self.flow_sent)
+        delivered = len(self.latencies)
+        dropped = sum(self.stats["drops"].values())
+        bits = self.packet_size * 8
+
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction):
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+        # Utilization of every directed link that carried traffic, busiest first
+        utilization = [(busy / elapsed if elapsed else 0.0, link) for link, busy in enumerate(self.link_busy) if busy]
+        utilization.sort(reverse=True)
+        busiest = []
+        for share, link in utilization[:5]:
+            u = bisect_left(self.offsets, link + 1) - 1
+            busiest.append({"link": (u, self.targets[link]), "utilization": round(share, 4),
+                            "packets": self.link_packets[link], "drops": self.link_drops[link]})
+        num_links = len(self.targets)
+
+        return {
+            "duration_ms": elapsed,
+            "events": self.stats["events"],
+            "flows": len(self.flow_src),
+            "packets_sent": sent,
+            "packets_delivered": delivered,
+            "packets_dropped": dropped,
+            "packets_in_flight": sent - delivered - dropped,
+            "drops": dict(self.stats["drops"]),
+            "offered_mbps": sent * bits / (elapsed * 1000) if elapsed else 0.0,
+            "throughput_mbps": delivered * bits / (elapsed * 1000) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": sum(ordered) / delivered if delivered else None,
+                "p50": percentile(0.5),
+                "p90": percentile(0.9),
+                "p99": percentile(0.99),
+                "max": ordered[-1] if ordered else None,
+            },
+            "link_utilization": {
+                "mean": sum(share for share, _ in utilization) / num_links if num_links else 0.0,
+                "max": utilization[0][0] if utilization else 0.0,
+                "busiest": busiest,
+            },
+        }
+
+    def flow_summary(self, flow):
+        # Counters of one flow
+        delivered = self.flow_delivered[flow]
+        return {"src": self.flow_src[flow], "dst": self.flow_dst[flow], "sent": self.flow_sent[flow],
+                "delivered": delivered,
+                "mean_latency_ms": self.flow_latency[flow] / delivered if delivered else None}
+
+
+# Binary topology files: a fixed little-endian header followed by 8-byte aligned fixed-width arrays, the CSR links
+# (int32 offsets, targets and weights) and optionally the routing, forwarding and predecessor (int32) tables as
+# row-major num_nodes x num_nodes matrices with -1 for no entry. Distances use the array type named in the header
+# (uint16, uint32 or int64, version 1 files are always int64) with its DISTANCE_SENTINELS marker for unreachable
+TOPOLOGY_FILE_MAGIC = b"NTOP"
+TOPOLOGY_FILE_VERSION = 2
+# magic, version, table flags, nodes, stored links, algorithm, distance type
+TOPOLOGY_FILE_HEADER = struct.Struct("<4sHHQQ32sc7x")
+HAS_ROUTING_TABLE, HAS_FORWARDING_TABLE, HAS_PREDECESSOR_TABLE = 1, 2, 4
+
+
+def _write_padding(file, written):
+    # Pad a section to the next multiple of 8 bytes so that every array starts aligned
+    if written % 8:
+        file.write(bytes(8 - written % 8))
+
+
+def save_topology(network, path, with_tables=True):
+    # Stream the links, and the tables that have been computed, into a binary topology file one row at a time
+    if sys.byteorder != "little":
+        raise RuntimeError("Topology files are little-endian and can only be written on little-endian machines")
+    graph = network._current_csr()
+    num_nodes = network.num_nodes
+    routing_table = network.routing_table
+    if isinstance(routing_table, ArrayTable):
+        distance_type = routing_table.typecode
+    else:
+        distance_type = distance_typecode(max(graph.weights, default=1) * max(num_nodes - 1, 1))
+    flags = 0
+    if with_tables and network.routing_table:
+        flags |= HAS_ROUTING_TABLE
+    if with_tables and network.forwarding_table:
+        flags |= HAS_FORWARDING_TABLE
+    if with_tables and network.predecessor_table:
+        flags |= HAS_PREDECESSOR_TABLE
+
+    with open(path, "wb") as file:
+        file.write(TOPOLOGY_FILE_HEADER.pack(TOPOLOGY_FILE_MAGIC, TOPOLOGY_FILE_VERSION, flags, num_nodes,
+                                             len(graph.targets), (network.algorithm or "").encode()[:32],
+                                             distance_type.encode()))
+        for section in (graph.offsets, graph.targets, graph.weights):
+            file.write(array('i', section).tobytes())
+            _write_padding(file, 4 * len(section))
+
+        # Compact tables already have the file layout and are written straight from their arrays
+        if flags & HAS_ROUTING_TABLE:
+            if isinstance(routing_table, ArrayTable):
+                file.write(routing_table.data)
+            else:
+                sentinel = DISTANCE_SENTINELS[distance_type]
+                for src in range(num_nodes):
+                    file.write(array(distance_type, [sentinel if dist == float('inf') else dist
+                                                     for dist in routing_table[src]]))
+            _write_padding(file, array(distance_type).itemsize * num_nodes * num_nodes)
+        if flags & HAS_FORWARDING_TABLE:
+            if isinstance(network.forwarding_table, ArrayTable):
+                file.write(network.forwarding_table.data)
+            else:
+                for src in range(num_nodes):
+                    row = array('i', [-1]) * num_nodes
+                    for dest, hop in network.forwarding_table[src].items():
+                        row[dest] = -1 if hop is None else hop
+                    file.write(row)
+            _write_padding(file, 4 * num_nodes * num_nodes)
+        if flags & HAS_PREDECESSOR_TABLE:
+            if isinstance(network.predecessor_table, ArrayTable):
+                file.write(network.predecessor_table.data)
+            else:
+                for src in range(num_nodes):
+                    file.write(array('i', [-1 if parent is None else parent
+                                           for parent in network.predecessor_table[src]]))
+
+
+def load_topology(path, backend="csr"):
+    # Map a binary topology file into memory and use its arrays in place: the CSR backend and the tables read straight
+    # from the mapping instead of being parsed. The mapping is copy-on-write, changes never reach the file
+    if sys.byteorder != "little":
+        raise RuntimeError("Topology files are little-endian and can only be read on little-endian machines")
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    magic, version, flags, num_nodes, num_links, algorithm, distance_type = TOPOLOGY_FILE_HEADER.unpack_from(mapping)
+    if magic != TOPOLOGY_FILE_MAGIC:
+        raise ValueError(f"{path} is not a topology file")
+    if version not in (1, TOPOLOGY_FILE_VERSION):
+        raise ValueError(f"Unsupported topology file version {version}")
+    distance_type = distance_type.decode() if version > 1 else "q"
+    if distance_type not in DISTANCE_SENTINELS:
+        raise ValueError(f"Unsupported distance type {distance_type!r} in {path}")
+
+    buffer = memoryview(mapping)
+    position = TOPOLOGY_FILE_HEADER.size
+
+    def section(count, item_format, item_size):
+        nonlocal position
+        view = buffer[position:position + count * item_size].cast(item_format)
+        position += -(-count * item_size // 8) * 8
+        return view
+
+    offsets = section(num_nodes + 1, 'i', 4)
+    targets = section(num_links, 'i', 4)
+    weights = section(num_links, 'i', 4)
+    network = NetworkTopology(num_nodes, backend=backend, graph=CSRGraph(num_nodes, offsets, targets, weights))
+    network._mapping = mapping  # The views above only stay valid while the mapping is alive
+
+    cells = num_nodes * num_nodes
+    if flags & HAS_ROUTING_TABLE:
+        network.routing_table = ArrayTable(section(cells, distance_type, array(distance_type).itemsize), num_nodes,
+                                           float('inf'), sentinel=DISTANCE_SENTINELS[distance_type])
+    if flags & HAS_FORWARDING_TABLE:
+        network.forwarding_table = ArrayTable(section(cells, 'i', 4), num_nodes, None, forwarding=True)
+    if flags & HAS_PREDECESSOR_TABLE:
+        network.predecessor_table = ArrayTable(section(cells, 'i', 4), num_nodes, None)
+    if flags:
+        # The engine is not stored, a repair that has to recompute the tables picks one for the topology
+        network.algorithm = algorithm.rstrip(b"\0").decode() or None
+        network.engine = "auto"
+        network.tables_version = network.version
+    return network
+
+
+def iter_table_rows(network):
+    # Yield (node, routing row, forwarding row) for every node, one row at a time straight from the tables.
+    # Unreachable destinations come out as None in both rows and the forwarding row has None for the node itself
+    for node in range(network.num_nodes):
+        routing = [None if dist == float('inf') else dist for dist in network.routing_table[node]]
+        forwarding = [None] * network.num_nodes
+        for dest, hop in network.forwarding_table.get(node, {}).items():
+            forwarding[dest] = hop
+        yield node, routing, forwarding
+
+
+def export_tables(network, path, chunk_rows=256):
+    # Stream the routing and forwarding tables into a JSONL file (one object per node) or a CSV file (one line per
+    # source/destination pair), gzip-compressed when the name ends in .gz. Rows are generated and written in chunks of
+    # chunk_rows nodes, so memory stays bounded by the chunk whatever the topology size
+    name = path[:-3] if path.endswith(".gz") else path
+    if not name.endswith((".jsonl", ".csv")):
+        raise ValueError(f"Unknown table export format: {path}")
+    opener = gzip.open if path.endswith(".gz") else open
+
+    with opener(path, "wt", newline="") as file:
+        rows = iter_table_rows(network)
+        if name.endswith(".csv"):
+            writer = csv.writer(file)
+            writer.writerow(["source", "destination", "cost", "next_hop"])
+        while True:
+            chunk = [row for _, row in zip(range(chunk_rows), rows)]
+            if not chunk:
+                break
+            if name.endswith(".csv"):
+                writer.writerows((node, dest, cost, hop) for node, routing, forwarding in chunk
+                                 for dest, (cost, hop) in enumerate(zip(routing, forwarding)))
+            else:
+                file.write("".join(json.dumps({"node": node, "routing": routing, "forwarding": forwarding}) + "\n"
+                                   for node, routing, forwarding in chunk))
+
+
+class PaginatedTableView:
+    # Read-only text view showing one page of a large table at a time. Only the rows of the current page are formatted,
+    # so the widget cost stays the same whatever the number of rows
+    def __init__(self, master, num_rows, format_row, page_size=50):
+        self.num_rows = num_rows
+        self.format_row = format_row  # Turns a row index into its text
+        self.page_size = page_size
+        self.page = 0
+        self.num_pages = max(1, -(-num_rows // page_size))
+
+        self.frame = tk.Frame(master)
+
+        # Text area with scroll bars in both directions, long rows are not wrapped
+        text_frame = tk.Frame(self.frame)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(text_frame, wrap=tk.NONE, height=min(page_size, 20), width=100)
+        vertical = tk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        horizontal = tk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(yscrollcommand=vertical.set, xscrollcommand=horizontal.set)
+        vertical.pack(side=tk.RIGHT, fill=tk.Y)
+        horizontal.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Page navigation
+        navigation = tk.Frame(self.frame)
+        navigation.pack()
+        self.previous_button = tk.Button(navigation, text="< Previous", command=lambda: self.show_page(self.page - 1))
+        self.previous_button.pack(side=tk.LEFT)
+        self.page_label = tk.Label(navigation)
+        self.page_label.pack(side=tk.LEFT)
+        self.next_button = tk.Button(navigation, text="Next >", command=lambda: self.show_page(self.page + 1))
+        self.next_button.pack(side=tk.LEFT)
+
+        self.show_page(0)
+
+    def show_page(self, page):
+        # Replace the text with the rows of the given page and update the navigation
+        self.page = min(max(page, 0), self.num_pages - 1)
+        start = self.page * self.page_size
+        stop = min(start + self.page_size, self.num_rows)
+
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(self.format_row(row) for row in range(start, stop)))
+        self.text.configure(state=tk.DISABLED)
+
+        self.page_label['text'] = f"Rows {start}-{max(stop - 1, start)} of {self.num_rows} (page {self.page + 1}/{self.num_pages})"
+        self.previous_button['state'] = tk.NORMAL if self.page > 0 else tk.DISABLED
+        self.next_button['state'] = tk.NORMAL if self.page < self.num_pages - 1 else tk.DISABLED
+
+
+# Level of detail: weight labels are drawn on every link only up to this many links and node labels on every node only
+# up to this many nodes, past that only the highlighted route is labelled
+EDGE_LABEL_MAX_EDGES = 300
+NODE_LABEL_MAX_NODES = 300
+
+
+class TopologyView:
+    # Topology drawing embedded in a Tk window. The figure, canvas and artists are created once and reused: a new
+    # topology replaces the data of the artists, while a highlighted route is blitted over a saved image of the
+    # topology so that only the route artists are rendered again
+    def __init__(self, master, link_color="black"):
+        self.figure = Figure()
+        self.axes = self.figure.add_subplot()
+        self.axes.set_axis_off()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+
+        # One collection for all links, the shortest-path tree and the route are animated artists drawn on top of it
+        self.links = LineCollection([], colors=link_color, linewidths=1, zorder=1)
+        self.tree = LineCollection([], colors="black", linewidths=1.5, zorder=2, animated=True)
+        self.route = LineCollection([], colors="red", linewidths=2.5, zorder=3, animated=True)
+        for collection in (self.links, self.tree, self.route):
+            self.axes.add_collection(collection)
+        self.nodes = self.axes.scatter([], [], color="#1f78b4", zorder=4)
+
+        self.network = None
+        self.positions = None
+        self.labels = []  # Text artists of the topology
+        self.route_labels = []  # Text artists of the highlighted route
+
+        # Image of the static artists, saved after every full draw (including resizes)
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def widget(self):
+        return self.canvas.get_tk_widget()
+
+    def set_topology(self, network):
+        # Draw all nodes and links of the network at its cached layout positions
+        self.network = network
+        self.positions = network.layout()
+        edges = list(network.graph.edges())
+
+        self.links.set_segments(self.segments([(i, j) for i, j, _ in edges]))
+
+        # Dense topologies are drawn with thin aliased links, which renders several times faster
+        dense = len(edges) > 10 * EDGE_LABEL_MAX_EDGES
+        self.links.set_linewidth(0.3 if dense else 1)
+        self.links.set_antialiased(not dense)
+        self.nodes.set_offsets(self.positions)
+        self.nodes.set_sizes([300 if network.num_nodes <= NODE_LABEL_MAX_NODES else 20])
+
+        for label in self.labels:
+            label.remove()
+        self.labels = []
+        if network.num_nodes <= NODE_LABEL_MAX_NODES:
+            self.labels.extend(self.node_label(node) for node in range(network.num_nodes))
+        if len(edges) <= EDGE_LABEL_MAX_EDGES:
+            self.labels.extend(self.edge_label(i, j, weight) for i, j, weight in edges)
+
+        # Fit the view around the nodes
+        if network.num_nodes:
+            low, high = self.positions.min(axis=0), self.positions.max(axis=0)
+            margin = (high - low).max() * 0.05 + 0.05
+            self.axes.set_xlim(low[0] - margin, high[0] + margin)
+            self.axes.set_ylim(low[1] - margin, high[1] + margin)
+
+        # The saved image shows the previous topology, the next full draw replaces it
+        self.background = None
+        self.highlight([], [])
+
+    def highlight(self, tree_edges, route_edges):
+        # Draw the given links over the topology, the previous highlight is dropped
+        self.tree.set_segments(self.segments(tree_edges))
+        self.route.set_segments(self.segments(route_edges))
+
+        # Label the route where the topology labels were culled
+        for label in self.route_labels:
+            label.remove()
+        self.route_labels = []
+        if route_edges and self.network.num_nodes > NODE_LABEL_MAX_NODES:
+            nodes = dict.fromkeys(node for edge in route_edges for node in edge)
+            self.route_labels.extend(self.node_label(node) for node in nodes)
+        if route_edges and self.network.graph.num_edges > EDGE_LABEL_MAX_EDGES:
+            self.route_labels.extend(self.edge_label(i, j, self.network.graph.weight(i, j)) for i, j in route_edges)
+        for label in self.route_labels:
+            label.set_animated(True)
+
+        # Without a saved image a full draw paints everything, otherwise only the route is rendered again
+        if self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_highlight()
+            self.canvas.blit(self.figure.bbox)
+
+    def on_draw(self, event):
+        # A full draw leaves out the animated artists: save the image of the topology and add them on top
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_highlight()
+
+    def draw_highlight(self):
+        for artist in (self.tree, self.route, *self.route_labels):
+            self.axes.draw_artist(artist)
+
+    def segments(self, edges):
+        # End point coordinates of the links, gathered in one indexing operation
+        return self.positions[np.asarray(edges, dtype=np.int64).reshape(-1, 2)] if edges else []
+
+    def node_label(self, node):
+        x, y = self.positions[node]
+        return self.axes.text(x, y, str(node), ha="center", va="center", fontsize=8, zorder=5)
+
+    def edge_label(self, i, j, weight):
+        x, y = (self.positions[i] + self.positions[j]) / 2
+        return self.axes.text(x, y, str(weight), ha="center", va="center", fontsize=7, zorder=5,
+                              bbox=dict(boxstyle="round,pad=0.1", facecolor="white", edgecolor="none"))
+
+
+class ComputationCancelled(Exception):
+    # Raised inside a background computation by its progress callback once the task has been cancelled
+    pass
+
+
+class BackgroundTask:
+    # Runs function(progress) on a worker thread so the Tk main loop keeps running. The worker only puts messages on a
+    # queue, which a poll rescheduled with after() drains on the main loop: Tk is never touched from the worker.
+    # Cancelling makes the next progress(done, total) call raise ComputationCancelled; a result that still arrives
+    # after cancel() is dropped
+    POLL_MS = 50
+
+    def __init__(self, root, function, on_done, on_progress=None, on_error=None, on_cancelled=None):
+        self.root = root
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+        self.finished = False
+
+        self.thread = threading.Thread(target=self.run, args=(function,), daemon=True)
+        self.thread.start()
+        self.root.after(self.POLL_MS, self.poll)
+
+    def progress(self, done, total):
+        # Called by the computation on the worker thread
+        if self.cancelled.is_set():
+            raise ComputationCancelled()
+        self.messages.put(("progress", (done, total)))
+
+    def run(self, function):
+        try:
+            result = function(self.progress)
+        except ComputationCancelled:
+            self.messages.put(("cancelled", None))
+        except Exception as error:
+            self.messages.put(("error", error))
+        else:
+            self.messages.put(("done", result))
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def poll(self):
+        # Apply what the worker queued since the last poll, only the latest progress is shown
+        latest = None
+        while True:
+            try:
+                kind, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest = value
+                continue
+
+            self.finished = True
+            if kind == "done" and not self.cancelled.is_set():
+                self.on_done(value)
+            elif kind == "error" and self.on_error:
+                self.on_error(value)
+            elif kind in ("done", "cancelled") and self.on_cancelled:
+                self.on_cancelled()
+            return
+
+        if latest is not None and self.on_progress and not self.cancelled.is_set():
+            self.on_progress(*latest)
+        self.root.after(self.POLL_MS, self.poll)
+
+
 class NetworkTopologyGUI:
     def __init__(self, root):
         # Initialize the GUI with a root window
@@ -245,10 +3703,15 @@ class NetworkTopologyGUI:
         self.num_nodes = None
         self.source_node = None
         self.destination_node = None
+        self.runtimes = {}  # Run time of the last table computation of each algorithm, in milliseconds
 
-        # Initialize canvas elements
-        self.canvas = None
-        self.algo_canvas = None
+        # Topology views, each created once for its window and redrawn in place
+        self.topology_view = None
+        self.route_view = None
+
+        # Computation running in the background, at most one at a time
+        self.task = None
+        self.algorithm_window = None
 
         # Initialize label text and label widget for user instructions
         self.label_text = tk.StringVar()
@@ -300,47 +3763,86 @@ class NetworkTopologyGUI:
             self.execute_button['state'] = tk.DISABLED  # Disable the execution button if input is invalid
 
 
-    def generate_topology(self):
-        # Check if a canvas exists and close it to prepare for new visualization
-        if self.canvas:
-            plt.close()  # Close the existing plot
-            self.canvas.get_tk_widget().pack_forget()  # Remove the canvas from the window
-            self.canvas = None  # Reset the canvas
+    def run_task(self, master, text, function, on_done):
+        # Run function(progress) in the background with a progress bar and a cancel button shown in master.
+        # The buttons starting computations are disabled until the task ends
+        frame = tk.Frame(master)
+        frame.pack()
+        label = tk.Label(frame, text=f"{text}...")
+        label.pack()
+        progress_bar = ttk.Progressbar(frame, length=300, mode="determinate")
+        progress_bar.pack(side=tk.LEFT)
+        tk.Button(frame, text="Cancel", command=self.cancel_task).pack(side=tk.LEFT)
+        self.set_buttons_enabled(False)
 
-        self.num_nodes = int(self.num_nodes_entry.get())  # Get the number of nodes from user input
+        def show_progress(done, total):
+            progress_bar.configure(maximum=total, value=done)
+            label['text'] = f"{text}: {done}/{total}"
 
-        self.network = NetworkTopology(self.num_nodes)  # Create a NetworkTopology object with the specified number of nodes
+        def finish(callback):
+            # Remove the progress widgets, give the buttons back and run the callback with its arguments
+            def handler(*args):
+                self.task = None
+                frame.destroy()
+                self.set_buttons_enabled(True)
+                if callback:
+                    callback(*args)
+            return handler
 
-        # Enable the Link State Routing and Distance Vector Routing buttons after creating the topology
-        self.link_state_button['state'] = tk.NORMAL
-        self.distance_vector_button['state'] = tk.NORMAL
+        self.task = BackgroundTask(self.root, function, on_done=finish(on_done), on_progress=show_progress,
+                                   on_error=finish(lambda error: messagebox.showerror("Error", str(error))),
+                                   on_cancelled=finish(None))
 
-        self.visualize_network()  # Call the method to visualize the network topology
+    def cancel_task(self):
+        if self.task:
+            self.task.cancel()
 
+    def set_buttons_enabled(self, enabled):
+        # Disable every button that starts a computation, or restore the state their inputs allow
+        if not enabled:
+            for button in (self.create_topology_button, self.link_state_button, self.distance_vector_button):
+                button['state'] = tk.DISABLED
+            if self.algorithm_window is not None and self.algorithm_window.winfo_exists():
+                self.execute_button['state'] = tk.DISABLED
+            return
 
-    def visualize_network(self):
-        # Check if a network exists
+        self.validate_input(None)
         if self.network:
-            # Generate a graph representation of the network using NetworkTopology's visualize_topology method
-            G = self.network.visualize_topology()
+            self.link_state_button['state'] = tk.NORMAL
+            self.distance_vector_button['state'] = tk.NORMAL
+        if self.algorithm_window is not None and self.algorithm_window.winfo_exists():
+            self.validate_source_destination(None)
 
-            # Create a new plot figure
-            plt.figure()
 
-            # Generate layout positions for nodes using spring layout algorithm
-            pos = nx.spring_layout(G)
+    def generate_topology(self):
+        num_nodes = int(self.num_nodes_entry.get())  # Get the number of nodes from user input
 
-            # Retrieve edge labels (weights) from the graph
-            labels = nx.get_edge_attributes(G, 'weight')
+        def generate(progress):
+            # Create a NetworkTopology object with the specified number of nodes and lay it out off the main loop.
+            # The bar follows the nodes of the generation and then the iterations of the layout
+            network = NetworkTopology(num_nodes, profiler=Profiler(), progress=progress)
+            network.layout(progress)
+            return network
 
-            # Draw the graph with nodes, labels, and edges
-            nx.draw(G, pos, with_labels=True)
-            nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
+        def show(network):
+            self.num_nodes = num_nodes
+            self.network = network
+            self.visualize_network()  # Call the method to visualize the network topology
 
-            # Create a canvas to display the generated plot within the GUI window
-            self.canvas = FigureCanvasTkAgg(plt.gcf(), master=self.root)
-            self.canvas.draw()
-            self.canvas.get_tk_widget().pack()  # Display the canvas in the GUI window
+        # The Link State Routing and Distance Vector Routing buttons are enabled once the topology exists
+        self.run_task(self.root, f"Generating a topology of {num_nodes} nodes", generate, show)
+
+
+    def visualize_network(self):
+        # Check if a network exists
+        if self.network:
+            # Create the view the first time, later topologies are drawn into the same canvas
+            if self.topology_view is None:
+                self.topology_view = TopologyView(self.root)
+                self.topology_view.widget().pack()
+
+            with self.network.phase("render_topology"):
+                self.topology_view.set_topology(self.network)
 
 
     def link_state_routing(self):
@@ -382,117 +3884,123 @@ class NetworkTopologyGUI:
         # Handle window closing event for the algorithm window
         self.algorithm_window.protocol("WM_DELETE_WINDOW", self.exit_algo)
 
+        # The route view of this window is created by the first execution
+        self.route_view = None
+
         # Set focus on the algorithm window and prevent interaction with other windows until closed
         self.algorithm_window.grab_set()
 
 
     def execute_algorithm(self, algorithm, source, destination):
-        # Close the canvas if it exists and prepare for a new visualization
-        if self.algo_canvas:
-            plt.close()
-            self.algo_canvas.get_tk_widget().pack_forget()
-            self.algo_canvas = None
-
         # Check if a network topology exists
         if self.network:
-            start_time = time.perf_counter()  # Measure algorithm runtime start
+            # Tables already computed with this algorithm on the unchanged topology are reused
+            if self.network.tables_current(algorithm) and self.network.forwarding_table:
+                self.show_route(algorithm, source, destination)
+                return
 
-            # Generate the forwarding table using the specified algorithm
-            self.network.generate_forwarding_table(algorithm)
+            def compute(progress):
+                start_time = time.perf_counter()  # Measure algorithm runtime start
 
-            end_time = time.perf_counter()  # Measure algorithm runtime end
+                # Generate the forwarding table using the specified algorithm, reporting every completed source
+                self.network.generate_forwarding_table(algorithm, progress=progress)
 
-            # Visualize the route from source to destination
-            G, forwarding_edges = self.network.visualize_route(int(source), int(destination))
+                # Calculate algorithm runtime in milliseconds
+                return (time.perf_counter() - start_time) * 1000
 
-            # Set edge colors based on forwarding edges for visualization
-            edge_colors = ["red" if edge in forwarding_edges else "black" for edge in G.edges()]
+            def show(runtime_ms):
+                self.runtimes[algorithm] = runtime_ms
+                self.show_route(algorithm, source, destination)
 
-            # Create a new plot figure for route visualization
-            plt.figure()
-            pos = nx.spring_layout(G)
-            labels = nx.get_edge_attributes(G, 'weight')
-            nx.draw(G, pos, with_labels=True, edge_color=edge_colors)
-            nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
+            self.run_task(self.algorithm_window, f"Computing {algorithm} tables", compute, show)
 
-            # Create a canvas to display the route visualization
-            self.algo_canvas = FigureCanvasTkAgg(plt.gcf(), master=self.algorithm_window)
-            self.algo_canvas.draw()
-            self.algo_canvas.get_tk_widget().pack()
+    def show_route(self, algorithm, source, destination):
+        # Links of the forwarding paths from the source and of the route to the destination
+        tree_edges, forwarding_edges = self.network.forwarding_edges(int(source), int(destination))
 
-            # Create a new window to display algorithm metrics
-            self.metrics_window = tk.Toplevel(self.root)
-            self.metrics_window.title(f"{algorithm} Algorithm Metrics")
+        # Draw the topology once per window at the same positions as the main view, then only restyle the route
+        with self.network.phase("render_route"):
+            if self.route_view is None:
+                self.route_view = TopologyView(self.algorithm_window, link_color="lightgrey")
+                self.route_view.widget().pack()
+                self.route_view.set_topology(self.network)
+            self.route_view.highlight(tree_edges, forwarding_edges)
 
-            # Release focus from algorithm window and set focus on metrics window
-            self.algorithm_window.grab_release()
-            self.metrics_window.grab_set()
+        # Create a new window to display algorithm metrics
+        self.metrics_window = tk.Toplevel(self.root)
+        self.metrics_window.title(f"{algorithm} Algorithm Metrics")
 
-            # Handle window closing event for the metrics window
-            self.metrics_window.protocol("WM_DELETE_WINDOW", self.exit_metrics)
+        # Release focus from algorithm window and set focus on metrics window
+        self.algorithm_window.grab_release()
+        self.metrics_window.grab_set()
 
-            # Create a frame in the metrics window to display algorithm metrics
-            metrics_frame = tk.Frame(self.metrics_window)
-            metrics_frame.pack()
+        # Handle window closing event for the metrics window
+        self.metrics_window.protocol("WM_DELETE_WINDOW", self.exit_metrics)
 
-            # Calculate algorithm runtime in milliseconds
-            runtime_ms = (end_time - start_time) * 1000
-            # Calculate delay in milliseconds
-            delay = self.network.routing_table[int(source)][int(destination)]*1.3 + len(forwarding_edges)*1.7
-            delay = delay * (random.random()/10 + 0.95)
+        # Create a frame in the metrics window to display algorithm metrics
+        metrics_frame = tk.Frame(self.metrics_window)
+        metrics_frame.pack()
 
-            # Display various algorithm metrics in the metrics window
-            tk.Label(metrics_frame, text=f"Packet Transmission Delay (End-to-End): {round(delay, 6)} milliseconds").pack()
-            tk.Label(metrics_frame, text=f"Total Cost of the Path Chosen: {self.network.routing_table[int(source)][int(destination)]}").pack()
-            tk.Label(metrics_frame, text=f"Run Time of the Algorithm: {round(runtime_ms, 6)} milliseconds").pack()
-            tk.Label(metrics_frame, text=f"Number of Hop Counts (End-to-End): {len(forwarding_edges)}").pack()
+        # Runtime of the computation that produced the tables shown
+        runtime_ms = self.runtimes[algorithm]
+        # Mean delay in milliseconds of a probe flow simulated packet by packet along the forwarding tables
+        simulator = PacketSimulator(self.network)
+        simulator.add_flow(int(source), int(destination), rate=100)
+        delay = simulator.run(1000)["latency_ms"]["mean"]
+        if delay is None:
+            delay = float('inf')  # Nothing got through
 
-            # Create a frame in the metrics window to display the forwarding table
-            forwarding_table_frame = tk.Frame(self.metrics_window)
-            forwarding_table_frame.pack()
+        # Display various algorithm metrics in the metrics window
+        tk.Label(metrics_frame, text=f"Packet Transmission Delay (End-to-End): {round(delay, 6)} milliseconds").pack()
+        tk.Label(metrics_frame, text=f"Total Cost of the Path Chosen: {self.network.routing_table[int(source)][int(destination)]}").pack()
+        tk.Label(metrics_frame, text=f"Run Time of the Algorithm: {round(runtime_ms, 6)} milliseconds").pack()
+        tk.Label(metrics_frame, text=f"Number of Hop Counts (End-to-End): {len(forwarding_edges)}").pack()
 
-            tk.Label(forwarding_table_frame, text="Forwarding Table:").pack()
+        # Create a frame in the metrics window to display the forwarding table
+        forwarding_table_frame = tk.Frame(self.metrics_window)
+        forwarding_table_frame.pack()
 
-            # Display the forwarding table information for each node in the network
-            for node, forwarding_info in self.network.forwarding_table.items():
-                tk.Label(forwarding_table_frame, text=f"Node {node}: {forwarding_info}").pack()
+        tk.Label(forwarding_table_frame, text="Forwarding Table:").pack()
 
-            # Button to save metrics to a file
-            save_button = tk.Button(self.metrics_window, text="Save", command=lambda: self.save_metrics_to_file(runtime=runtime_ms,
-                                                                                                                num_hopes=len(forwarding_edges),
-                                                                                                                source=source,
-                                                                                                                destination=destination,
-                                                                                                                algorithm=algorithm,
-                                                                                                                delay=delay))
-            save_button.pack(side=tk.BOTTOM)
+        # Display the forwarding table information one page of nodes at a time
+        forwarding_table = self.network.forwarding_table
+        PaginatedTableView(forwarding_table_frame, self.network.num_nodes,
+                           lambda node: f"Node {node}: {forwarding_table[node]}").frame.pack()
+
+        # Button to save metrics to a file
+        save_button = tk.Button(self.metrics_window, text="Save", command=lambda: self.save_metrics_to_file(runtime=runtime_ms,
+                                                                                                            num_hopes=len(forwarding_edges),
+                                                                                                            source=source,
+                                                                                                            destination=destination,
+                                                                                                            algorithm=algorithm,
+                                                                                                            delay=delay))
+        save_button.pack(side=tk.BOTTOM)
 
 
     def save_metrics_to_file(self, source, destination, runtime, num_hopes, algorithm, delay):
-        # Determine the output file name based on the selected algorithm
-        out_file_name = "link_state_routing_algorithm_metrics.txt" if algorithm == "Link State Routing" else "distance_vector_routing_algorithm_metrics.txt"
+        # Determine the output file names based on the selected algorithm
+        prefix = "link_state_routing_algorithm" if algorithm == "Link State Routing" else "distance_vector_routing_algorithm"
+        out_file_name = f"{prefix}_metrics.txt"
+        tables_file_name = f"{prefix}_tables.jsonl.gz"
+        topology_file_name = f"{prefix}_topology.ntop"
+
+        # Stream the routing and forwarding tables into their own compressed file, and the topology with its tables
+        # into a binary file that the benchmark and simulate commands can load with --topology
+        export_tables(self.network, tables_file_name)
+        save_topology(self.network, topology_file_name)
 
         # Write the metrics to the output file
         with open(out_file_name, "w") as file:
             file.write("Topology:\n")
             
-            # Write the network's adjacency matrix to the file
-            for row in self.network.adjacency_matrix:
-                file.write(f"\t{row}\n")
+            # Write the network's links to the file, one per line
+            for i, j, weight in self.network.graph.edges():
+                file.write(f"\t{i} - {j}: {weight}\n")
 
             file.write("\n")    
 
-            file.write("Routing Tables:\n")
-            
-            # Write the network's adjacency matrix to the file
-            for node, routing_info in self.network.routing_table.items():
-                file.write(f"\tNode {node}: {routing_info}\n")
-            
-            file.write("\n")
-            file.write("Forwarding Tables:\n")
-            
-            # Write the forwarding tables information for each node to the file
-            for node, forwarding_info in self.network.forwarding_table.items():
-                file.write(f"\tNode {node}: {forwarding_info}\n")
+            file.write(f"Routing and Forwarding Tables: {tables_file_name}\n")
+            file.write(f"Topology File: {topology_file_name}\n")
             
             # Write various routing metrics to the file
             file.write("\n")
@@ -503,17 +4011,21 @@ class NetworkTopologyGUI:
             file.write(f"Run Time of the Algorithm: {round(runtime, 6)} milliseconds\n")
             file.write(f"Number of Hop Counts (End-to-End): {num_hopes}\n")
 
+            # Phase timings and kernel counters collected since the topology was generated
+            if self.network.profiler:
+                file.write("\n")
+                file.write("Profile:\n")
+                for line in self.network.profiler.report():
+                    file.write(f"\t{line}\n")
+
     def exit_application(self):
-        # Check if a canvas exists and close it before destroying the main application window
-        if self.canvas:
-            plt.close()
+        self.cancel_task()
         self.root.destroy()  # Destroy the main application window
         sys.exit()  # Exit the application
 
     def exit_algo(self):
-        # Check if an algorithm canvas exists and close it before destroying the algorithm window
-        if self.algo_canvas:
-            plt.close()
+        self.cancel_task()  # A computation for this window is abandoned
+        self.route_view = None  # The view goes away with its window
         self.algorithm_window.grab_release()  # Release focus from the algorithm window
         self.algorithm_window.destroy()  # Destroy the algorithm window
 
@@ -524,9 +4036,216 @@ class NetworkTopologyGUI:
         self.metrics_window.destroy()  # Destroy the metrics window
 
 
+# Short command line names of the routing algorithms
+BENCHMARK_ALGORITHMS = {
+    "link_state": "Link State Routing",
+    "distance_vector": "Distance Vector Routing",
+}
+
+
+def benchmark_topologies(nodes, densities, seeds, model="erdos_renyi", topology_files=None, save_directory=None):
+    # Yield (description, network, generation time in ms) for every topology of the sweep,
+    # or for every saved topology file when those are given instead. Generated topologies are also saved into
+    # save_directory when given, as <model>-<nodes>-<density>-<seed>.ntop
+    if topology_files:
+        for path in topology_files:
+            start = time.perf_counter()
+            network = load_topology(path)
+            yield {"model": path, "nodes": network.num_nodes, "density": None, "seed": None}, network, \
+                (time.perf_counter() - start) * 1000
+        return
+
+    # Densities are link probabilities of the erdos_renyi model, the other models have a fixed shape
+    if model != "erdos_renyi":
+        densities = [None]
+
+    for num_nodes in nodes:
+        for density in densities:
+            for seed in seeds:
+                options = {"probability": density} if density is not None else {}
+                start = time.perf_counter()
+                network = NetworkTopology(num_nodes, model=model, seed=seed, **options)
+                generation_ms = (time.perf_counter() - start) * 1000
+                if save_directory:
+                    os.makedirs(save_directory, exist_ok=True)
+                    save_topology(network, os.path.join(save_directory, f"{model}-{num_nodes}-{density}-{seed}.ntop"))
+                yield {"model": model, "nodes": num_nodes, "density": density, "seed": seed}, network, generation_ms
+
+
+def run_benchmark(nodes, densities, seeds, algorithms, engines, model="erdos_renyi", repeats=3, workers=None,
+                  measure_memory=True, topology_files=None, save_directory=None, log=None):
+    # Sweep every combination of topology size, density and seed (or the saved topology files), and time each
+    # algorithm/engine pair on it. Every topology is solved by all pairs, and their tables are cross-checked against
+    # the first one. Returns one result dictionary per run
+    rows = []
+    for description, network, generation_ms in benchmark_topologies(nodes, densities, seeds, model, topology_files,
+                                                                     save_directory):
+        num_nodes = network.num_nodes
+        links = network.graph.num_edges
+        link_density = 2 * links / (num_nodes * (num_nodes - 1)) if num_nodes > 1 else 0
+        reference = None
+
+        for algorithm in algorithms:
+            for engine in engines:
+                if engine == "numpy" and np is None:
+                    if log:
+                        log("skipping the numpy engine, NumPy is not installed")
+                    continue
+
+                # Cold run: lazily built views are dropped so that building them is part of the measurement
+                network._adjacency_matrix = None
+                network._adjacency_array = None
+                gc.collect()
+                start = time.perf_counter()
+                network.generate_forwarding_table(BENCHMARK_ALGORITHMS[algorithm], engine=engine, workers=workers)
+                cold_ms = (time.perf_counter() - start) * 1000
+
+                warm = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    network.generate_forwarding_table(BENCHMARK_ALGORITHMS[algorithm], engine=engine, workers=workers)
+                    warm.append((time.perf_counter() - start) * 1000)
+
+                # Peak Python heap of one more run, kept apart from the timings since tracing slows it down.
+                # Memory of pool workers is not included
+                peak_kb = None
+                if measure_memory:
+                    tracemalloc.start()
+                    network.generate_forwarding_table(BENCHMARK_ALGORITHMS[algorithm], engine=engine, workers=workers)
+                    peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+                    tracemalloc.stop()
+
+                tables = (network.routing_table, network.forwarding_table)
+                if reference is None:
+                    reference = tables
+                row = dict(description)
+                row.update({
+                    "links": links, "link_density": round(link_density, 4),
+                    "algorithm": algorithm, "engine": network.engine,
+                    "generation_ms": round(generation_ms, 3), "cold_ms": round(cold_ms, 3),
+                    "warm_ms": round(statistics.median(warm), 3) if warm else None,
+                    "warm_min_ms": round(min(warm), 3) if warm else None,
+                    "peak_memory_kb": peak_kb,
+                    "routing_matches": tables[0] == reference[0],
+                    "forwarding_matches": tables[1] == reference[1],
+                })
+                rows.append(row)
+                if log:
+                    log(", ".join(f"{key}={value}" for key, value in row.items()))
+    return rows
+
+
+def write_benchmark_results(rows, path):
+    # Write the results as JSON when the file name ends in .json and as CSV otherwise
+    with open(path, "w", newline="") as file:
+        if path.endswith(".json"):
+            json.dump(rows, file, indent=2)
+        elif rows:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def parse_arguments(argv=None):
+    # Without a sub-command the GUI is started, "benchmark" runs the headless harness and "simulate" the packet-level
+    # traffic simulation
+    parser = argparse.ArgumentParser(description="Network topology routing simulator")
+    commands = parser.add_subparsers(dest="command")
+
+    benchmark = commands.add_parser("benchmark", help="time the routing algorithms headless over a parameter sweep")
+    benchmark.add_argument("--nodes", type=int, nargs="+", default=[50, 100, 200], help="topology sizes")
+    benchmark.add_argument("--densities", type=float, nargs="+", default=[0.3],
+                           help="link probabilities of the erdos_renyi model")
+    benchmark.add_argument("--seeds", type=int, nargs="+", default=[0], help="topology seeds")
+    benchmark.add_argument("--model", choices=sorted(TOPOLOGY_MODELS), default="erdos_renyi")
+    benchmark.add_argument("--topology", dest="topology_files", nargs="+", default=None,
+                           help="saved topology files to benchmark instead of generating topologies")
+    benchmark.add_argument("--save-topologies", dest="save_directory", default=None,
+                           help="directory to save the generated topologies in, for --topology later on")
+    benchmark.add_argument("--algorithms", choices=sorted(BENCHMARK_ALGORITHMS), nargs="+",
+                           default=sorted(BENCHMARK_ALGORITHMS))
+    benchmark.add_argument("--engines", choices=ROUTING_ENGINES, nargs="+", default=["python"])
+    benchmark.add_argument("--repeats", type=int, default=3, help="warm runs per measurement")
+    benchmark.add_argument("--workers", type=int, default=None, help="processes of the parallel engine")
+    benchmark.add_argument("--no-memory", dest="measure_memory", action="store_false",
+                           help="skip the traced run measuring peak memory")
+    benchmark.add_argument("--output", default="benchmark_results.csv", help="result file, .csv or .json")
+
+    simulate = commands.add_parser("simulate", help="run the packet-level traffic simulation headless")
+    simulate.add_argument("--nodes", type=int, default=100, help="topology size")
+    simulate.add_argument("--model", choices=sorted(TOPOLOGY_MODELS), default="erdos_renyi")
+    simulate.add_argument("--seed", type=int, default=0, help="seed of the topology and the traffic")
+    simulate.add_argument("--topology", dest="topology_file", default=None,
+                          help="saved topology file to simulate instead of generating one")
+    simulate.add_argument("--save-topology", dest="save_file", default=None,
+                          help="file to save the topology and its tables in, for --topology later on")
+    simulate.add_argument("--algorithm", choices=sorted(BENCHMARK_ALGORITHMS), default="link_state")
+    simulate.add_argument("--flows", type=int, default=100, help="flows between random node pairs")
+    simulate.add_argument("--rate", type=float, default=100, help="packets per second of every flow")
+    simulate.add_argument("--arrivals", choices=("poisson", "bursty"), default="poisson")
+    simulate.add_argument("--burst-size", type=float, default=10, help="mean packets per burst of bursty flows")
+    simulate.add_argument("--duration", type=float, default=10000, help="simulated milliseconds")
+    simulate.add_argument("--bandwidth", type=float, default=10, help="link bandwidth in Mbit/s")
+    simulate.add_argument("--packet-size", type=int, default=1000, help="bytes per packet")
+    simulate.add_argument("--queue", type=int, default=64, help="packets a link can queue")
+    simulate.add_argument("--output", default=None, help="JSON file for the results instead of standard output")
+
+    return parser.parse_args(argv)
+
+
+def run_benchmark_command(arguments):
+    rows = run_benchmark(arguments.nodes, arguments.densities, arguments.seeds, arguments.algorithms,
+                         arguments.engines, model=arguments.model, repeats=arguments.repeats,
+                         workers=arguments.workers, measure_memory=arguments.measure_memory,
+                         topology_files=arguments.topology_files, save_directory=arguments.save_directory,
+                         log=lambda message: print(message, file=sys.stderr))
+    write_benchmark_results(rows, arguments.output)
+
+    # A mismatch between algorithms or engines is a bug, so make it visible in the exit status
+    if not all(row["routing_matches"] and row["forwarding_matches"] for row in rows):
+        print("Routing results differ between algorithms or engines", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_simulate_command(arguments):
+    if arguments.topology_file:
+        network = load_topology(arguments.topology_file)
+    else:
+        network = NetworkTopology(arguments.nodes, model=arguments.model, seed=arguments.seed)
+    if not network.tables_current(BENCHMARK_ALGORITHMS[arguments.algorithm]) or not network.forwarding_table:
+        network.generate_forwarding_table(BENCHMARK_ALGORITHMS[arguments.algorithm])
+    if arguments.save_file:
+        save_topology(network, arguments.save_file)
+
+    simulator = PacketSimulator(network, bandwidth_mbps=arguments.bandwidth, packet_size=arguments.packet_size,
+                                queue_capacity=arguments.queue, seed=arguments.seed)
+    simulator.add_random_flows(arguments.flows, arguments.rate, arguments.arrivals, arguments.burst_size)
+    start_time = time.perf_counter()
+    results = simulator.run(arguments.duration)
+    results["runtime_s"] = round(time.perf_counter() - start_time, 3)
+
+    text = json.dumps(results, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
 # Check if this script is the main entry point of the program
 if __name__ == "__main__":
+    arguments = parse_arguments()
+
+    # Run the headless benchmark harness when asked for it
+    if arguments.command == "benchmark":
+        sys.exit(run_benchmark_command(arguments))
+    if arguments.command == "simulate":
+        sys.exit(run_simulate_command(arguments))
+
     # Create a Tkinter root window
+    load_gui_toolkit()
     root = tk.Tk()
     
     # Create an instance of the NetworkTopologyGUI class, passing the root window as an argument
@@ -0,0 +1,275 @@
+import random
+
+import pytest
+
+import main
+from main import NetworkTopology
+
+
+ALGORITHMS = ("Link State Routing", "Distance Vector Routing")
+ENGINES = ["python", "parallel"] + (["numpy"] if main.np is not None else [])
+MODELS = ("erdos_renyi", "grid", "barabasi_albert")
+
+
+def table_rows(table, num_nodes):
+    # Plain lists of a dict-of-rows or compact table, forwarding rows included
+    return [list(table[src].values()) if hasattr(table[src], "values") else list(table[src])
+            for src in range(num_nodes)]
+
+
+def baseline_forwarding(network):
+    # The forwarding rule of the original post-processing pass: the direct link when it is a shortest route, otherwise
+    # the lowest numbered neighbor starting a shortest route
+    distances = [network.dijkstra(src) for src in range(network.num_nodes)]
+    expected = {}
+    for src in range(network.num_nodes):
+        row = {}
+        for dest in range(network.num_nodes):
+            if dest == src:
+                continue
+            cost = distances[src][dest]
+            if cost == float('inf'):
+                row[dest] = None
+            elif network.graph.weight(src, dest) == cost:
+                row[dest] = dest
+            else:
+                row[dest] = min(neighbor for neighbor, weight in network.graph.neighbors(src)
+                                if weight + distances[neighbor][dest] == cost)
+        expected[src] = row
+    return expected
+
+
+def path_cost(network, path):
+    return sum(network.graph.weight(u, v) for u, v in zip(path, path[1:]))
+
+
+def random_change(network, changes):
+    # One random link cost change, removal, addition or node failure
+    u, v, _ = changes.choice(list(network.graph.edges()))
+    a, b = changes.sample(range(network.num_nodes), 2)
+    draw = changes.random()
+    if draw < 0.35:
+        network.set_link_cost(u, v, changes.randint(1, 10))
+    elif draw < 0.6:
+        network.remove_link(u, v)
+    elif draw < 0.95:
+        if not network.graph.weight(a, b):
+            network.add_link(a, b, changes.randint(1, 10))
+    else:
+        network.fail_node(a)
+
+
+def test_equal_cost_tie_prefers_lowest_neighbor_behind_a_direct_link():
+    # 0-1-2-3 and 0-2-3 both cost 3, the direct link to 2 only decides the route to 2 itself
+    graph = main.CSRGraph.from_edges(4, [(0, 1, 1), (0, 2, 2), (1, 2, 1), (2, 3, 1)])
+    network = NetworkTopology(4, graph=graph)
+    for algorithm in ALGORITHMS:
+        for engine in ENGINES:
+            network.generate_forwarding_table(algorithm, engine=engine, workers=2)
+            assert network.forwarding_table[0][3] == 1
+            assert network.forwarding_table[0][2] == 2
+
+
+@pytest.mark.parametrize("model", MODELS)
+@pytest.mark.parametrize("seed", range(3))
+def test_algorithms_and_engines_agree_with_the_baseline(model, seed):
+    network = NetworkTopology(36, model=model, seed=seed)
+    expected = baseline_forwarding(network)
+    reference = None
+    for algorithm in ALGORITHMS:
+        for engine in ENGINES:
+            network.generate_forwarding_table(algorithm, engine=engine, workers=2)
+            tables = tuple(table_rows(table, 36) for table in
+                           (network.routing_table, network.forwarding_table, network.predecessor_table))
+            assert network.forwarding_table == expected, (algorithm, engine)
+            reference = reference or tables
+            assert tables == reference, (algorithm, engine)
+
+
+def test_edge_list_bellman_ford_matches_dijkstra():
+    network = NetworkTopology(40, seed=4)
+    assert network.all_pairs_bellman_ford(with_paths=True, mode="edge_list") == \
+        network.all_pairs_dijkstra(with_paths=True)
+
+
+def test_compact_and_dict_tables_agree():
+    network = NetworkTopology(40, seed=5)
+    network.generate_forwarding_table("Link State Routing", compact=True)
+    compact = [table_rows(table, 40) for table in (network.routing_table, network.forwarding_table)]
+    network.generate_forwarding_table("Link State Routing", compact=False)
+    assert compact == [table_rows(table, 40) for table in (network.routing_table, network.forwarding_table)]
+
+
+def test_distance_vector_simulator_matches_the_tables():
+    network = NetworkTopology(40, seed=6)
+    network.generate_forwarding_table("Distance Vector Routing")
+    for mode in ("sync", "async"):
+        for poison_reverse in (False, True):
+            simulator = main.DistanceVectorSimulator(network, mode=mode, poison_reverse=poison_reverse, seed=1)
+            stats = simulator.run()
+            assert stats["converged"]
+            assert table_rows(simulator.routing_table(), 40) == table_rows(network.routing_table, 40)
+            assert simulator.forwarding_table() == network.forwarding_table
+
+
+@pytest.mark.parametrize("backend", sorted(main.STORAGE_BACKENDS))
+def test_link_loads_match_the_forwarded_routes(backend):
+    # The adjacency-list backend yields links in insertion order, so it is filled in shuffled order
+    source = NetworkTopology(60, seed=7)
+    edges = list(source.graph.edges())
+    random.Random(7).shuffle(edges)
+    network = NetworkTopology(60, backend=backend, graph=main.STORAGE_BACKENDS[backend].from_edges(60, edges))
+    network.generate_forwarding_table("Link State Routing")
+
+    walked = dict.fromkeys(((u, v) for u, v, _ in network.graph.edges()), 0)
+    pairs = [(src, dst) for src in range(60) for dst in range(60) if src != dst]
+    for path in network.paths(pairs):
+        for u, v in zip(path, path[1:]):
+            walked[(u, v) if u < v else (v, u)] += 1
+    assert network.link_loads() == walked
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("backend", sorted(main.STORAGE_BACKENDS))
+def test_repaired_tables_match_a_full_recompute(algorithm, backend):
+    network = NetworkTopology(30, backend=backend, seed=8)
+    network.generate_forwarding_table(algorithm, engine="python")
+    changes = random.Random(8)
+    for step in range(40):
+        random_change(network, changes)
+        reference = NetworkTopology(30, graph=network.graph)
+        reference.generate_forwarding_table(algorithm, engine="python")
+        assert network.tables_current()
+        assert network.routing_table == reference.routing_table, step
+        assert network.forwarding_table == reference.forwarding_table, step
+        assert network.predecessor_table == reference.predecessor_table, step
+
+
+@pytest.mark.parametrize("compact", (True, False))
+def test_topology_file_round_trip(tmp_path, compact):
+    network = NetworkTopology(40, seed=9)
+    network.generate_forwarding_table("Link State Routing", compact=compact)
+    main.save_topology(network, tmp_path / "topology.ntop")
+
+    loaded = main.load_topology(tmp_path / "topology.ntop")
+    assert list(loaded.graph.edges()) == list(network.graph.edges())
+    assert loaded.tables_current("Link State Routing")
+    for name in ("routing_table", "forwarding_table", "predecessor_table"):
+        assert table_rows(getattr(loaded, name), 40) == table_rows(getattr(network, name), 40)
+
+    main.save_topology(network, tmp_path / "links.ntop", with_tables=False)
+    assert not main.load_topology(tmp_path / "links.ntop").routing_table
+
+
+def test_loaded_tables_without_predecessors_can_be_repaired(tmp_path):
+    network = NetworkTopology(30, seed=10)
+    network.calculate_routing_table("Link State Routing", compact=True)
+    main.save_topology(network, tmp_path / "topology.ntop")
+
+    loaded = main.load_topology(tmp_path / "topology.ntop")
+    u, v, weight = next(iter(loaded.graph.edges()))
+    loaded.set_link_cost(u, v, weight + 5)
+    reference = NetworkTopology(30, graph=loaded.graph)
+    reference.generate_forwarding_table("Link State Routing")
+    assert loaded.routing_table == reference.routing_table
+
+
+def test_ecmp_routes_follow_every_equal_cost_next_hop():
+    network = NetworkTopology(40, model="grid", seed=11)
+    network.generate_forwarding_table("Link State Routing", ecmp=True)
+    distances = network.routing_table
+    table = network.ecmp_table()
+    for src in range(40):
+        for dst in range(40):
+            if src == dst:
+                continue
+            equal_cost = sorted(neighbor for neighbor, weight in network.graph.neighbors(src)
+                                if weight + distances[neighbor][dst] == distances[src][dst])
+            assert sorted(table.next_hops(src, dst)) == equal_cost
+            assert network.forwarding_table[src][dst] in equal_cost
+            for flow in range(3):
+                assert path_cost(network, network.ecmp_route(src, dst, flow)) == distances[src][dst]
+
+    balance = network.ecmp_balance(flows_per_pair=2)
+    assert balance["multipath_pairs"] > 0
+    assert balance["ecmp"]["max_link_load"] <= balance["single_path"]["max_link_load"]
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_areas_are_connected_and_bounded(model):
+    network = NetworkTopology(500, model=model, seed=12)
+    areas = main.partition_areas(network.graph, 40)
+    members = {}
+    for node, area in enumerate(areas):
+        members.setdefault(area, []).append(node)
+    assert sorted(members) == list(range(len(members)))
+    for nodes in members.values():
+        assert len(nodes) <= 40
+        reached, stack = {nodes[0]}, [nodes[0]]
+        while stack:
+            for neighbor, _ in network.graph.neighbors(stack.pop()):
+                if areas[neighbor] == areas[nodes[0]] and neighbor not in reached:
+                    reached.add(neighbor)
+                    stack.append(neighbor)
+        assert len(reached) == len(nodes)
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_area_routing_matches_flat_routing(model):
+    network = NetworkTopology(64, model=model, seed=12)
+    areas = network.area_routing(area_size=12)
+    assert areas.stats()["areas"] > 1
+    for src in range(0, 64, 5):
+        flat = network.dijkstra(src)
+        assert areas.distances_from(src) == flat
+        for dst in range(64):
+            assert areas.distance(src, dst) == flat[dst]
+            path = areas.route(src, dst)
+            assert path[0] == src and path[-1] == dst
+            assert path_cost(network, path) == flat[dst]
+
+
+def test_packet_latency_without_congestion():
+    network = NetworkTopology(30, seed=13)
+    network.generate_forwarding_table("Link State Routing")
+    simulator = main.PacketSimulator(network, bandwidth_mbps=100, seed=1)
+    simulator.add_flow(0, 17, rate=1)
+    results = simulator.run(20000)
+
+    cost, path = network.route(0, 17)
+    hops = len(path) - 1
+    expected = cost * simulator.PROPAGATION_MS_PER_COST + hops * (simulator.wire_ms + simulator.PROCESSING_MS)
+    assert results["packets_sent"] > 0
+    assert results["packets_dropped"] == 0
+    assert results["latency_ms"]["max"] == pytest.approx(expected)
+
+
+def test_packet_queues_overflow_under_load_and_runs_repeat():
+    network = NetworkTopology(20, seed=14)
+    network.generate_forwarding_table("Link State Routing")
+
+    def simulate():
+        simulator = main.PacketSimulator(network, bandwidth_mbps=1, queue_capacity=2, seed=3)
+        simulator.add_random_flows(30, rate=400, arrivals="bursty")
+        return simulator.run(2000)
+
+    results = simulate()
+    assert results["drops"]["queue"] > 0
+    assert results["packets_delivered"] + results["packets_dropped"] <= results["packets_sent"]
+    assert simulate() == results
+
+
+def test_bidirectional_search_matches_dijkstra():
+    network = NetworkTopology(80, seed=15)
+    graph = network.graph.to_csr()
+    pairs = random.Random(15).sample([(src, dst) for src in range(80) for dst in range(80)], 200)
+    for src, dst in pairs:
+        cost, path = main.bidirectional_dijkstra_csr(graph.offsets, graph.targets, graph.weights, src, dst)
+        assert cost == network.dijkstra(src)[dst]
+        assert path[0] == src and path[-1] == dst and path_cost(network, path) == cost
+
+    network.remove_link(*next(iter(network.graph.edges()))[:2])
+    for neighbor, _ in list(network.graph.neighbors(5)):
+        network.remove_link(5, neighbor)
+    graph = network.graph.to_csr()
+    assert main.bidirectional_dijkstra_csr(graph.offsets, graph.targets, graph.weights, 0, 5) == (float('inf'), [])